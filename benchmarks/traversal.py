@@ -0,0 +1,111 @@
+"""
+    Benchmark of per-node overhead of tree walks. Compares a recursive walk over Word-like views (as trees were walked
+    before ContextTree), an iterative walk with an explicit stack over ContextTree arrays, and the depth-first index arrays
+    of ContextTree, which are computed one depth at a time. Run from repository root:
+        python benchmarks/traversal.py
+"""
+import numpy as np
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from vlmc import VLMC, ContextTree
+
+
+def recursive_walk(node):
+    """
+        Pre-order list of nodes, obtained by recursion over "children" attribute of views.
+    """
+    if node.children is None:
+        return [node.node]
+    nodes = [node.node]
+    for child in node.children.values():
+        nodes.extend(recursive_walk(child))
+    return nodes
+
+
+def stack_walk(tree):
+    """
+        Pre-order array of nodes, obtained with an explicit stack over arrays of tree.
+    """
+    nodes = []
+    stack = [0]
+    first_child, n_children = tree.first_child.tolist(), tree.n_children.tolist()
+    while stack:
+        node = stack.pop()
+        nodes.append(node)
+        stack.extend(range(first_child[node]+n_children[node]-1, first_child[node]-1, -1))
+    return np.array(nodes)
+
+
+def array_walk(tree):
+    """
+        Pre-order array of nodes, obtained from positions computed one depth at a time. Cached arrays are cleared first,
+        so that their computation is measured.
+    """
+    tree.clear_cache()
+    return tree.preorder
+
+
+def measure(fn, *args):
+    start = time.perf_counter()
+    try:
+        result = fn(*args)
+    except RecursionError:
+        return None, np.nan
+    return result, time.perf_counter()-start
+
+
+def get_tree(vocabulary_size, n):
+    """
+        Tree of counts without max order for a random sample of length n.
+    """
+    X = np.random.default_rng(0).integers(0, vocabulary_size, n)
+    vlmc = VLMC(
+        max_order=None,
+        vocabulary=list(range(vocabulary_size)),
+        make_admissible=False
+    )
+    vlmc.fit(X)
+    return vlmc.count_tree
+
+
+def get_deep_tree(depth):
+    """
+        Binary tree in which only the first child of each depth is internal, so that depth of tree is given depth.
+    """
+    n_nodes = 2*depth+1
+    parent = np.r_[-1, np.repeat(np.r_[0, np.arange(1, n_nodes-2, 2)], 2)]
+    return ContextTree(
+        parent=parent,
+        symbol=np.r_[-1, np.tile([0, 1], depth)],
+        n_ocurrences=np.zeros(n_nodes, dtype=np.int64),
+        transition_counts=np.zeros((n_nodes, 2), dtype=np.int64),
+        vocabulary=[0, 1]
+    )
+
+
+if __name__ == '__main__':
+    print('{:>30} {:>10} {:>8} {:>16} {:>16} {:>16}'.format(
+        'tree', 'nodes', 'depth', 'recursive ns/node', 'stack ns/node', 'arrays ns/node'
+    ))
+    for name, tree in [
+        ('|V|=4, sample of 1e6', get_tree(4, 10**6)),
+        ('|V|=2, sample of 1e6', get_tree(2, 10**6)),
+        ('|V|=2, depth 1e5', get_deep_tree(10**5)),
+    ]:
+        recursive, t_recursive = measure(recursive_walk, tree.view(0))
+        stack, t_stack = measure(stack_walk, tree)
+        arrays, t_arrays = measure(array_walk, tree)
+        assert np.array_equal(stack, arrays)
+        assert (recursive is None) or np.array_equal(recursive, arrays)
+        print('{:>30} {:>10} {:>8} {:>16} {:>16.1f} {:>16.1f}'.format(
+            name,
+            tree.n_nodes,
+            tree.max_depth,
+            'RecursionError' if recursive is None else '{:.1f}'.format(1e9*t_recursive/tree.n_nodes),
+            1e9*t_stack/tree.n_nodes,
+            1e9*t_arrays/tree.n_nodes
+        ))
@@ -0,0 +1,30 @@
+import numpy as np
+
+
+def generate_sample(vocabulary_size, n, order=2, seed=0):
+    """
+        Sample of length n from a random Markov chain of given order, as an array of codes.
+    """
+    rng = np.random.default_rng(seed)
+    V = vocabulary_size
+    P = rng.dirichlet([0.3]*V, size=V**order)
+    X = np.zeros(n, dtype=np.int64)
+    X[:order] = rng.integers(0, V, order)
+    u = rng.random(n)
+    cumulative = np.cumsum(P, axis=1)
+    for i in range(order, n):
+        context = 0
+        for s in X[i-order:i]:
+            context = context*V + s
+        X[i] = min(np.searchsorted(cumulative[context], u[i]), V-1)
+    return X
+
+
+def assert_same_tree(a, b):
+    """
+        Checks that two ContextTrees have the same nodes and counts.
+    """
+    np.testing.assert_array_equal(a.parent, b.parent)
+    np.testing.assert_array_equal(a.symbol, b.symbol)
+    np.testing.assert_array_equal(a.n_ocurrences, b.n_ocurrences)
+    np.testing.assert_array_equal(a.transition_counts, b.transition_counts)
@@ -0,0 +1,58 @@
+import os
+
+import pytest
+
+from vlmc import VLMC, Counter, SerialBackend, ThreadBackend, ProcessBackend
+from helpers import assert_same_tree, generate_sample
+
+
+@pytest.mark.parametrize('engine', ['kgram', 'reference'])
+def test_backends_give_same_tree(engine):
+    X = generate_sample(3, 3000, seed=7)
+    trees = []
+    for backend in (SerialBackend(), ThreadBackend(njobs=2), ProcessBackend(njobs=2)):
+        with backend:
+            vlmc = VLMC(max_order=4, vocabulary=[0, 1, 2])
+            Counter.fit(vlmc=vlmc, X=vlmc.encode(X), njobs=backend.njobs, engine=engine, backend=backend)
+            trees.append(vlmc.context_tree)
+    assert_same_tree(trees[0], trees[1])
+    assert_same_tree(trees[0], trees[2])
+
+
+@pytest.mark.skipif(not os.path.isdir('/proc/self'), reason='Requires /proc to inspect worker mappings.')
+def test_reused_pool_does_not_keep_sample_mapped():
+    X = generate_sample(3, 20000, seed=8)
+    with ProcessBackend(njobs=2) as backend:
+        for engine in ('kgram', 'reference'):
+            vlmc = VLMC(max_order=3, vocabulary=[0, 1, 2])
+            Counter.fit(vlmc=vlmc, X=vlmc.encode(X[:3000]), njobs=2, engine=engine, backend=backend)
+        assert len(backend.pids) == 2
+        for pid in backend.pids:
+            with open('/proc/{}/maps'.format(pid)) as maps:
+                assert not any('psm_' in line for line in maps)
+
+
+def fail_on_odd(X, item):
+    if item % 2:
+        raise RuntimeError('Task {} failed.'.format(item))
+    return int(X[item])
+
+
+@pytest.mark.skipif(not os.path.isdir('/dev/shm'), reason='Requires /dev/shm to inspect shared memory blocks.')
+def test_failed_task_releases_shared_sample():
+    before = set(os.listdir('/dev/shm'))
+    with ProcessBackend(njobs=2) as backend:
+        with pytest.raises(RuntimeError):
+            with backend.share(generate_sample(3, 1000, seed=9)) as sample:
+                name = sample.initargs[0].lstrip('/')
+                assert name in os.listdir('/dev/shm')
+                backend.map(fail_on_odd, range(10), sample)
+    after = set(os.listdir('/dev/shm'))
+    assert name not in after
+    assert not any(block.startswith('psm_') for block in after - before)
+
+
+def test_unknown_backend_is_rejected():
+    vlmc = VLMC(max_order=2, vocabulary=[0, 1])
+    with pytest.raises(ValueError):
+        vlmc.fit([0, 1, 1, 0], njobs=2, backend='cluster')
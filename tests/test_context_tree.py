@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from vlmc import VLMC, ContextTree
+from helpers import generate_sample
+
+
+def recursive_walk(view, postorder=False):
+    nodes = []
+    for child in (view.children or {}).values():
+        nodes.extend(recursive_walk(child, postorder=postorder))
+    return nodes + [view.node] if postorder else [view.node] + nodes
+
+
+@pytest.fixture(params=[0, 10**9], ids=['wide', 'narrow'])
+def fitted(request, monkeypatch):
+    """
+        Fitted tree object whose trees are walked either one depth at a time or with an explicit stack.
+    """
+    monkeypatch.setattr(ContextTree, 'min_level_width', request.param)
+    vlmc = VLMC(max_order=6, vocabulary=[0, 1, 2])
+    vlmc.fit(generate_sample(3, 4000, seed=22), method='bct')
+    return vlmc
+
+
+def test_depth_first_orders_match_recursive_walk(fitted):
+    for tree in (fitted.count_tree, fitted.context_tree):
+        root = tree.view(0)
+        np.testing.assert_array_equal(tree.preorder, recursive_walk(root))
+        np.testing.assert_array_equal(tree.postorder, recursive_walk(root, postorder=True))
+        np.testing.assert_array_equal(tree.preorder[tree.preorder_position], np.arange(tree.n_nodes))
+
+
+def test_subtree_size_matches_recursive_walk(fitted):
+    tree = fitted.count_tree
+    for node in range(tree.n_nodes):
+        assert tree.subtree_size[node] == len(recursive_walk(tree.view(node)))
+
+
+@pytest.mark.parametrize('order', ['level', 'preorder', 'postorder'])
+def test_iter_nodes_matches_orders(fitted, order):
+    tree = fitted.context_tree
+    expected = {'level': np.arange(tree.n_nodes), 'preorder': tree.preorder, 'postorder': tree.postorder}[order]
+    assert [view.node for view in fitted.iter_nodes(order=order)] == expected.tolist()
+    assert [view.node for view in fitted.iter_leaves()] == tree.leaves.tolist()
+    with pytest.raises(ValueError):
+        next(fitted.iter_nodes(order='inorder'))
+
+
+def test_leaf_index_follows_context_tree(fitted):
+    # Index is built for each tree in turn, which differ in their leaves
+    for penalty in (0, 1e6, 10):
+        fitted.solve(method='bic', penalty=penalty)
+        tree = fitted.context_tree
+        assert len(fitted.leaf_index) == len(tree.leaves)
+        for view in fitted.iter_nodes():
+            leaf = fitted.get_leaf([tree.vocabulary[c] for c in view.codes])
+            assert (leaf.node == view.node) if view.is_leaf else (leaf is None)
+
+
+def test_cleared_cache_is_computed_again(fitted):
+    tree = fitted.count_tree
+    preorder, subtree_size, leaves = tree.preorder, tree.subtree_size, tree.leaves
+    tree.clear_cache()
+    assert tree.subtree_size is not subtree_size and tree.leaves is not leaves
+    np.testing.assert_array_equal(tree.preorder, preorder)
+    np.testing.assert_array_equal(tree.subtree_size, subtree_size)
+    np.testing.assert_array_equal(tree.leaves, leaves)
+
+
+@pytest.mark.parametrize('start', [None, 0, 2])
+def test_associate_searches_children_without_table(fitted, monkeypatch, start):
+    X = generate_sample(3, 2000, seed=34)
+    trees = (fitted.count_tree, fitted.context_tree)
+    expected = [tree.associate(X, start=start) for tree in trees]
+    monkeypatch.setattr(ContextTree, 'max_children_table_size', 0)
+    for tree, contexts in zip(trees, expected):
+        np.testing.assert_array_equal(tree.associate(X, start=start), contexts)
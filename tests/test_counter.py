@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from vlmc import VLMC, Counter, AssociationError
+from helpers import assert_same_tree, generate_sample
+
+
+@pytest.mark.parametrize('vocabulary_size, n, max_order, make_admissible', [
+    (2, 500, 4, False),
+    (3, 2000, 4, True),
+    (2, 3000, 5, True),
+    (4, 1000, 3, False),
+])
+def test_kgram_engine_matches_reference_engine(vocabulary_size, n, max_order, make_admissible):
+    X = generate_sample(vocabulary_size, n, seed=n)
+    trees = []
+    for engine in ('kgram', 'reference'):
+        vlmc = VLMC(max_order=max_order, vocabulary=list(range(vocabulary_size)), make_admissible=make_admissible)
+        Counter.fit(vlmc=vlmc, X=vlmc.encode(X), njobs=1, engine=engine)
+        trees.append(vlmc.context_tree)
+    assert_same_tree(*trees)
+
+
+def test_counts_match_brute_force():
+    X = generate_sample(3, 1500, seed=1)
+    vlmc = VLMC(max_order=3, vocabulary=[0, 1, 2], make_admissible=False)
+    Counter.fit(vlmc=vlmc, X=vlmc.encode(X), njobs=1)
+    tree = vlmc.context_tree
+    for node in range(1, tree.n_nodes):
+        codes = tree.get_codes(node)
+        d = len(codes)
+        expected = np.zeros(3, dtype=np.int64)
+        for i in range(d, len(X)):
+            if tuple(X[i-d:i]) == codes:
+                expected[X[i]] += 1
+        np.testing.assert_array_equal(tree.transition_counts[node], expected)
+
+
+def test_reference_engine_rejects_sparse_trees():
+    vlmc = VLMC(max_order=2, vocabulary=[0, 1], tree_construction='sparse')
+    with pytest.raises(ValueError):
+        Counter.fit(vlmc=vlmc, X=np.zeros(10, dtype=np.uint8), njobs=1, engine='reference')
+
+
+@pytest.mark.parametrize('engine', ['kgram', 'reference'])
+def test_unassociated_words_raise(engine):
+    # First symbol only appears at head of sample, so the word that starts with it has no context in admissible tree
+    X = np.r_[2, generate_sample(2, 500, seed=5)]
+    vlmc = VLMC(max_order=4, vocabulary=['a', 'b', 'c'])
+    with pytest.raises(AssociationError) as error:
+        Counter.fit(vlmc=vlmc, X=X, njobs=1, engine=engine)
+    assert isinstance(error.value, ValueError)
+    depth = vlmc.context_tree.max_depth
+    assert error.value.positions.tolist() == [depth]
+    assert error.value.words == [tuple('abc'[c] for c in X[:depth])]
@@ -0,0 +1,134 @@
+import numpy as np
+import pytest
+
+from vlmc import VLMC, KGramCounts, merge_counts
+from vlmc.kgram_counts import get_level_transitions, unique_windows
+from helpers import assert_same_tree, generate_sample
+
+
+def assert_same_counts(a, b):
+    assert a.n == b.n
+    np.testing.assert_array_equal(a.windows, b.windows)
+    np.testing.assert_array_equal(a.window_counts, b.window_counts)
+    np.testing.assert_array_equal(a.head, b.head)
+    np.testing.assert_array_equal(a.tail, b.tail)
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 50, 997])
+def test_partial_fit_matches_fit(chunk_size):
+    X = generate_sample(3, 4000, seed=9).astype(np.uint8)
+    streamed = KGramCounts(max_order=4, vocabulary_size=3)
+    for start in range(0, len(X), chunk_size):
+        streamed.partial_fit(X[start:start+chunk_size])
+    assert_same_counts(streamed, KGramCounts(max_order=4, vocabulary_size=3).fit(X))
+
+
+def test_truncate_matches_fit():
+    X = generate_sample(2, 3000, seed=10).astype(np.uint8)
+    counts = KGramCounts(max_order=6, vocabulary_size=2).fit(X)
+    for d in range(7):
+        assert_same_counts(counts.truncate(d), KGramCounts(max_order=d, vocabulary_size=2).fit(X))
+
+
+@pytest.mark.parametrize('method', ['bic', 'context', 'bct'])
+def test_vlmc_partial_fit_matches_fit(method):
+    X = generate_sample(3, 5000, seed=11)
+    streamed = VLMC(max_order=5, vocabulary=[0, 1, 2])
+    for start in range(0, len(X), 700):
+        streamed.partial_fit(X[start:start+700])
+    streamed.finalize(method=method)
+    fitted = VLMC(max_order=5, vocabulary=[0, 1, 2])
+    fitted.fit(X, method=method)
+    assert_same_tree(streamed.context_tree, fitted.context_tree)
+
+
+@pytest.mark.parametrize('grouping', [[1, 1, 1, 1], [2, 2], [1, 3], [3, 1], [4]])
+def test_merge_counts_matches_fit(grouping):
+    X = generate_sample(3, 6000, seed=12).astype(np.uint8)
+    shards = [KGramCounts(max_order=4, vocabulary_size=3).fit(s) for s in np.array_split(X, 4)]
+    groups, start = [], 0
+    for size in grouping:
+        groups.append(merge_counts(shards[start:start+size]))
+        start += size
+    assert_same_counts(merge_counts(groups), KGramCounts(max_order=4, vocabulary_size=3).fit(X))
+
+
+def test_save_load_round_trip(tmp_path):
+    X = generate_sample(2, 2000, seed=13).astype(np.uint8)
+    counts = KGramCounts(max_order=5, vocabulary_size=2).fit(X)
+    counts.save(tmp_path / 'counts.npz')
+    loaded = KGramCounts.load(tmp_path / 'counts.npz')
+    assert loaded.max_order == counts.max_order
+    assert_same_counts(loaded, counts)
+
+
+def test_shards_keep_configured_order_across_fits():
+    X = generate_sample(2, 4000, seed=14)
+    shards = np.array_split(X, 3)
+    vlmc = VLMC(max_order=8, vocabulary=[0, 1])
+    counts = [vlmc.count(shards[0])]
+    vlmc.fit_counts(counts[0], method='bic')
+    counts.append(vlmc.count(shards[1]))
+    vlmc.fit(shards[2], method='bic')
+    counts.append(vlmc.count(shards[2]))
+    assert all(c.max_order == 8 for c in counts)
+    vlmc.fit_counts(merge_counts(counts), method='bic')
+    fitted = VLMC(max_order=8, vocabulary=[0, 1])
+    fitted.fit(X, method='bic')
+    assert_same_tree(vlmc.context_tree, fitted.context_tree)
+
+
+def test_hash_collisions_fall_back_to_row_unique(monkeypatch):
+    # Windows of 71 binary symbols do not fit in 63 bits, so they are hashed
+    X = generate_sample(2, 3000, seed=31).astype(np.uint8)
+    windows = np.lib.stride_tricks.sliding_window_view(X, 71)
+    expected = KGramCounts(max_order=70, vocabulary_size=2).fit(X)
+
+    # With multiplier one, hash of a window is the sum of its codes, so windows with the same number of ones collide
+    monkeypatch.setattr('vlmc.kgram_counts._HASH_MULTIPLIER', np.uint64(1))
+    distinct, counts = unique_windows(windows)
+    expected_distinct, expected_counts = np.unique(windows, axis=0, return_counts=True)
+    np.testing.assert_array_equal(distinct, expected_distinct)
+    np.testing.assert_array_equal(counts, expected_counts)
+
+    collided = KGramCounts(max_order=70, vocabulary_size=2).fit(X)
+    for a, b in zip(collided.levels, expected.levels):
+        for key in ('parent', 'symbol', 'n_ocurrences', 'transition_counts'):
+            np.testing.assert_array_equal(a[key], b[key])
+
+
+@pytest.mark.parametrize('method', ['bic', 'context', 'bct'])
+def test_sparse_levels_match_dense_levels(monkeypatch, method):
+    X = generate_sample(4, 5000, seed=32)
+    fitted = []
+    for max_dense_size in (KGramCounts.max_dense_size, 0):
+        monkeypatch.setattr(KGramCounts, 'max_dense_size', max_dense_size)
+        vlmc = VLMC(max_order=4, vocabulary=[0, 1, 2, 3], tree_construction='sparse')
+        vlmc.fit(X, method=method, **({'child_count_admissible': True} if method == 'context' else {}))
+        fitted.append(vlmc)
+    assert_same_tree(fitted[0].count_tree, fitted[1].count_tree)
+    assert_same_tree(fitted[0].context_tree, fitted[1].context_tree)
+
+    counts = KGramCounts(max_order=3, vocabulary_size=4).fit(X)
+    assert all('transitions' in level for level in counts.levels)
+    for word in [(), (1,), (0, 3), (2, 2, 1), (3, 3, 3)]:
+        d = len(word)
+        expected = np.bincount([X[i] for i in range(d, len(X)) if tuple(X[i-d:i]) == word], minlength=4)
+        np.testing.assert_array_equal(counts.get_transition_counts(word), expected)
+
+
+def test_large_vocabulary_keeps_transitions_sparse():
+    # Dense transitions of contexts of depth 2 and 3 would take several GiB
+    V = 5000
+    X = np.random.default_rng(33).integers(0, V, 200000)
+    vlmc = VLMC(max_order=3, vocabulary=list(range(V)), tree_construction='sparse')
+    vlmc.fit(X, method='bct')
+    tree = vlmc.count_tree
+    assert tree.max_depth == 3
+    assert tree.nbytes < 2**26
+    for node in tree.leaves[::20000]:
+        codes = tree.get_codes(node)
+        d = len(codes)
+        is_context = np.all(np.lib.stride_tricks.sliding_window_view(X[:-1], d) == codes, axis=1)
+        expected = np.bincount(X[d:][is_context], minlength=V)
+        np.testing.assert_array_equal(tree.get_transition_counts(node), expected)
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from vlmc import KGramCounts, OnlineCounts
+from helpers import generate_sample
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 500])
+def test_window_matches_last_positions(chunk_size):
+    X = generate_sample(3, 3000, seed=17).astype(np.uint8)
+    online = OnlineCounts(max_order=3, vocabulary_size=3, window=800)
+    for start in range(0, len(X), chunk_size):
+        online.update(X[start:start+chunk_size])
+    counts = online.to_kgram_counts()
+    last = KGramCounts(max_order=3, vocabulary_size=3).fit(X[-(800+3):])
+    np.testing.assert_array_equal(counts.windows, last.windows)
+    np.testing.assert_array_equal(counts.window_counts, last.window_counts)
+    assert counts.n == 800
+
+
+def test_decay_matches_weighted_counts():
+    X = generate_sample(2, 5000, seed=18)
+    k, decay = 4, 0.995
+    online = OnlineCounts(max_order=k, vocabulary_size=2, decay=decay)
+    for start in range(0, len(X), 37):
+        online.update(X[start:start+37])
+    keys = np.lib.stride_tricks.sliding_window_view(X, k+1) @ (2**np.arange(k, -1, -1))
+    expected = np.bincount(keys, weights=decay**np.arange(len(keys)-1, -1, -1), minlength=2**(k+1))
+    actual = np.zeros(2**(k+1))
+    for key, c in online.counts.items():
+        actual[key] = c*online.scale
+    # Keys dropped below min_count on rescale can only lose a fraction of a count
+    np.testing.assert_allclose(actual, expected, atol=1)
+
+
+def test_decay_keys_stay_bounded():
+    # Drifting source: a new region of a large vocabulary every 200 symbols, so stale keys are never seen again
+    rng = np.random.default_rng(19)
+    online = OnlineCounts(max_order=2, vocabulary_size=1000, decay=0.99)
+    sizes = []
+    for region in range(200):
+        online.update(rng.integers(0, 5, 200) + 5*region)
+        sizes.append(len(online.counts))
+    assert max(sizes[100:]) <= 2*max(sizes[:20])
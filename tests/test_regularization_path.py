@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from vlmc import VLMC
+from helpers import assert_same_tree, generate_sample
+
+
+@pytest.mark.parametrize('method, parameter, values, kwargs', [
+    ('bic', 'penalty', np.linspace(0, 20, 41), {}),
+    ('bct', 'beta', np.linspace(0.05, 0.95, 19), {}),
+    ('context', 'beta', np.linspace(0.1, 2, 20), {}),
+    ('context', 'alpha', np.linspace(0.01, 1, 12), {'child_count_admissible': True}),
+])
+@pytest.mark.parametrize('max_size', [2**24, 50])
+def test_path_matches_solve(method, parameter, values, kwargs, max_size):
+    X = generate_sample(3, 4000, seed=20)
+    vlmc = VLMC(max_order=5, vocabulary=[0, 1, 2])
+    vlmc.fit(X, method=method)
+    path = vlmc.regularization_path(values, method=method, parameter=parameter, max_size=max_size, **kwargs)
+    assert path.masks.shape == (len(values), vlmc.count_tree.n_nodes)
+    for value, mask in zip(path.values, path.masks):
+        np.testing.assert_array_equal(mask, vlmc.solve(method=method, **{parameter: value}, **kwargs))
+
+
+def test_segments_cover_values():
+    X = generate_sample(2, 3000, seed=21)
+    vlmc = VLMC(max_order=6, vocabulary=[0, 1])
+    vlmc.fit(X)
+    path = vlmc.regularization_path(np.linspace(0, 30, 61))
+    segments = path.get_segments()
+    assert segments[0][0] == path.values[0] and segments[-1][1] == path.values[-1]
+    for first, last, tree in segments:
+        vlmc.solve(penalty=first)
+        assert_same_tree(tree, vlmc.context_tree)
+        vlmc.solve(penalty=last)
+        assert_same_tree(tree, vlmc.context_tree)
+        assert len(tree.leaves) == path.n_leaves[np.searchsorted(path.values, first)]
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from vlmc import VLMC, KGramCounts, SketchCounts
+from helpers import generate_sample
+
+
+def get_contexts(levels):
+    """
+        Dict from codes of each context in levels, given by symbols of its nodes from the root, to its number of ocurrences
+        and transition counts.
+    """
+    contexts = {}
+    codes = [()]
+    for level in levels:
+        if level['parent'][0] >= 0:
+            codes = [codes[p] + (s,) for p, s in zip(level['parent'].tolist(), level['symbol'].tolist())]
+        for c, n, t in zip(codes, level['n_ocurrences'].tolist(), level['transition_counts'].tolist()):
+            contexts[c] = (n, t)
+    return contexts
+
+
+def test_wide_sketch_is_exact():
+    X = generate_sample(3, 5000, seed=23).astype(np.uint8)
+    sketch = SketchCounts(max_order=4, vocabulary_size=3, width=2**20)
+    for start in range(0, len(X), 900):
+        sketch.partial_fit(X[start:start+900])
+    assert get_contexts(sketch.levels) == get_contexts(KGramCounts(max_order=4, vocabulary_size=3).fit(X).levels)
+
+
+@pytest.mark.parametrize('width', [16, 128, 1024])
+def test_narrow_sketch_never_underestimates(width):
+    X = generate_sample(3, 5000, seed=24).astype(np.uint8)
+    sketch = SketchCounts(max_order=4, vocabulary_size=3, width=width).fit(X)
+    estimated = get_contexts(sketch.levels)
+    exact = get_contexts(KGramCounts(max_order=4, vocabulary_size=3).fit(X).levels)
+    for context, (n, transitions) in estimated.items():
+        if context in exact:
+            assert n >= exact[context][0]
+            assert all(e >= t for e, t in zip(transitions, exact[context][1]))
+    # Contexts that appear more often than error bound are never dropped
+    assert all(context in estimated for context, (n, _) in exact.items() if n > sketch.error)
+
+
+@pytest.mark.parametrize('tree_construction', ['full', 'sparse'])
+def test_saturated_sketch_keeps_tree_bounded(tree_construction):
+    rng = np.random.default_rng(25)
+    X = rng.integers(0, 30, 20000)
+    sketch = SketchCounts(max_order=4, vocabulary_size=30, width=4096).fit(X)
+    assert all(len(level['parent']) <= sketch.width for level in sketch.levels)
+    vlmc = VLMC(max_order=4, vocabulary=list(range(30)), tree_construction=tree_construction)
+    vlmc.fit_counts(sketch)
+    assert vlmc.count_tree.n_nodes == sum(len(level['parent']) for level in sketch.levels)
@@ -0,0 +1,110 @@
+import math
+import warnings
+
+import numpy as np
+import pytest
+
+from vlmc import VLMC, BCTSolver
+from helpers import generate_sample
+
+
+@pytest.mark.parametrize('method', ['bic', 'context', 'bct'])
+def test_head_only_contexts_do_not_warn(method):
+    # First symbol never appears again, so its context only has transitions from head of sample
+    X = np.r_[2, generate_sample(2, 3000, seed=26)]
+    vlmc = VLMC(max_order=4, vocabulary=[0, 1, 2], make_admissible=False)
+    with warnings.catch_warnings():
+        warnings.simplefilter('error')
+        vlmc.fit(X, method=method)
+
+
+def kt_log_probability(counts):
+    """
+        Logarithm of Krichevsky-Trofimov probability of transition counts, as product of sequential predictive probabilities
+        (a_j + 1/2)/(m + |V|/2) of each transition.
+    """
+    log_probability = 0.0
+    for a in counts:
+        log_probability += sum(math.log(i + 0.5) for i in range(int(a)))
+    log_probability -= sum(math.log(m + len(counts)/2) for m in range(int(sum(counts))))
+    return log_probability
+
+
+@pytest.mark.parametrize('vocabulary_size, n, max_order', [(2, 2000, 5), (4, 1500, 3)])
+def test_kt_estimator_matches_direct_product(vocabulary_size, n, max_order):
+    X = generate_sample(vocabulary_size, n, seed=27)
+    vlmc = VLMC(max_order=max_order, vocabulary=list(range(vocabulary_size)))
+    vlmc.fit(X, method='bct')
+    tree = vlmc.count_tree
+    expected = [kt_log_probability(tree.transition_counts[node].tolist()) for node in range(tree.n_nodes)]
+    np.testing.assert_allclose(BCTSolver.P_e, expected, rtol=1e-9)
+
+
+def get_leaf_codes(tree):
+    return sorted(tree.get_codes(leaf) for leaf in tree.leaves)
+
+
+def bic_leaves(view, penalty):
+    """
+        Leaves of subtree of view with maximum penalized log-likelihood, and its value, obtained recursively.
+    """
+    n = view.n_ocurrences
+    log_likelihood = sum(c*math.log(c/n) for c in view.transition_counts.values() if c > 0) - penalty
+    if view.is_leaf:
+        return log_likelihood, [view.codes]
+    value, leaves = 0.0, []
+    for child in view.children.values():
+        child_value, child_leaves = bic_leaves(child, penalty)
+        value += child_value
+        leaves += child_leaves
+    return (value, leaves) if value > log_likelihood else (log_likelihood, [view.codes])
+
+
+@pytest.mark.parametrize('penalty', [None, 0.5, 3, 20])
+@pytest.mark.parametrize('vocabulary_size, n, max_order', [(2, 3000, 6), (3, 2000, 4)])
+def test_bic_matches_recursive_solver(penalty, vocabulary_size, n, max_order):
+    X = generate_sample(vocabulary_size, n, seed=28)
+    vlmc = VLMC(max_order=max_order, vocabulary=list(range(vocabulary_size)))
+    vlmc.fit(X, method='bic', penalty=penalty)
+    if penalty is None:
+        penalty = (vocabulary_size-1)/2*math.log(len(X))
+    _, leaves = bic_leaves(vlmc.count_tree.view(0), penalty)
+    assert get_leaf_codes(vlmc.context_tree) == sorted(leaves)
+
+
+def context_leaves(view, n, alpha, beta, child_count_admissible):
+    """
+        Leaves of subtree of view kept by Context algorithm, obtained recursively, and whether view keeps its children.
+    """
+    def entropy_term(view):
+        m = view.n_ocurrences
+        return (m/n)*sum((c/m)*math.log(c/m) for c in view.transition_counts.values() if c > 0) if m > 0 else 0.0
+
+    if view.is_leaf:
+        return False, [view.codes]
+    keeps, leaves = False, []
+    for child in view.children.values():
+        child_keeps, child_leaves = context_leaves(child, n, alpha, beta, child_count_admissible)
+        keeps |= child_keeps
+        leaves += child_leaves
+    delta = sum(entropy_term(child) for child in view.children.values()) - entropy_term(view)
+    admissible = view.word_len <= beta*math.log(n) and delta > math.log(n)/n
+    if child_count_admissible:
+        admissible &= min(view.transition_counts.values()) > 2*alpha*n/math.log(n)
+    return (True, leaves) if keeps or admissible else (False, [view.codes])
+
+
+@pytest.mark.parametrize('alpha, beta, child_count_admissible', [
+    (1/16, 1, False),
+    (1/16, 0.5, False),
+    (0.01, 1, True),
+    (0.1, 2, True),
+])
+@pytest.mark.parametrize('vocabulary_size, n, max_order', [(2, 3000, 6), (3, 2000, 4)])
+def test_context_matches_recursive_solver(alpha, beta, child_count_admissible, vocabulary_size, n, max_order):
+    X = generate_sample(vocabulary_size, n, seed=29)
+    vlmc = VLMC(max_order=max_order, vocabulary=list(range(vocabulary_size)))
+    vlmc.fit(X, method='context', alpha=alpha, beta=beta, child_count_admissible=child_count_admissible)
+    n_ocurrences = vlmc.count_tree.n_ocurrences[0]
+    _, leaves = context_leaves(vlmc.count_tree.view(0), n_ocurrences, alpha, beta, child_count_admissible)
+    assert get_leaf_codes(vlmc.context_tree) == sorted(leaves)
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+from vlmc import VLMC, SuffixArray
+from helpers import generate_sample
+
+
+@pytest.mark.parametrize('X', [
+    np.random.default_rng(0).integers(0, 3, 1000),
+    np.zeros(300, dtype=np.int64),
+    np.tile([0, 1, 1], 100),
+    np.array([2]),
+    # Codes larger than sample length
+    np.array([1000, 3, 1000, 3, 1000]),
+    np.random.default_rng(1).integers(0, 2, 2000).astype(np.uint8),
+])
+def test_suffix_array_and_lcp_match_brute_force(X):
+    index = SuffixArray(X=X)
+    suffixes = [tuple(X[i:].tolist()) for i in range(len(X))]
+    assert index.sa.tolist() == sorted(range(len(X)), key=lambda i: suffixes[i])
+
+    def common_prefix(a, b):
+        h = 0
+        while h < min(len(a), len(b)) and a[h] == b[h]:
+            h += 1
+        return h
+
+    expected = [0] + [common_prefix(suffixes[index.sa[r-1]], suffixes[index.sa[r]]) for r in range(1, len(X))]
+    assert index.lcp.tolist() == expected
+
+
+def test_query_context_matches_brute_force():
+    X = generate_sample(3, 2000, seed=3)
+    vlmc = VLMC(max_order=3, vocabulary=['a', 'b', 'c'])
+    symbols = np.array(['a', 'b', 'c'])[X]
+    vlmc.fit(symbols)
+    for context in [(), ('a',), ('b', 'c'), ('c', 'c', 'a', 'b')]:
+        word = vlmc.query_context(context)
+        d = len(context)
+        expected = {s: 0 for s in 'abc'}
+        for i in range(d, len(X)):
+            if tuple(symbols[i-d:i].tolist()) == context:
+                expected[symbols[i]] += 1
+        assert {s: int(c) for s, c in word.transition_counts.items()} == expected
+
+
+@pytest.mark.parametrize('X, min_depth', [
+    (generate_sample(2, 1500, order=3, seed=4), 4),
+    # Long run of a single symbol, whose contexts are as deep as the run
+    (np.r_[1, np.zeros(400, dtype=np.int64), 1, 0, 0], 400),
+])
+def test_unbounded_tree_counts_match_brute_force(X, min_depth):
+    vlmc = VLMC(max_order=None, vocabulary=[0, 1], make_admissible=False)
+    vlmc.fit(X)
+    tree = vlmc.count_tree
+    assert tree.max_depth >= min_depth
+    for node in range(1, tree.n_nodes):
+        codes = tree.get_codes(node)
+        d = len(codes)
+        expected = np.zeros(2, dtype=np.int64)
+        for i in range(d, len(X)):
+            if tuple(X[i-d:i].tolist()) == codes:
+                expected[X[i]] += 1
+        np.testing.assert_array_equal(tree.transition_counts[node], expected)
@@ -0,0 +1,113 @@
+import numpy as np
+import pytest
+
+from vlmc import VLMC, CountCache
+from helpers import assert_same_tree, generate_sample
+
+
+@pytest.mark.parametrize('method', ['bic', 'context', 'bct'])
+@pytest.mark.parametrize('vocabulary_size, n, max_order', [(2, 3000, 6), (3, 2000, 4), (4, 5000, 3)])
+def test_sparse_construction_matches_full(method, vocabulary_size, n, max_order):
+    X = generate_sample(vocabulary_size, n, seed=n)
+    trees = []
+    for tree_construction in ('full', 'sparse'):
+        vlmc = VLMC(max_order=max_order, vocabulary=list(range(vocabulary_size)), tree_construction=tree_construction)
+        vlmc.fit(X, method=method)
+        trees.append(vlmc.context_tree)
+    assert_same_tree(*trees)
+
+
+def test_sparse_tree_only_keeps_appearing_contexts():
+    X = generate_sample(3, 500, seed=5)
+    vlmc = VLMC(max_order=4, vocabulary=[0, 1, 2], make_admissible=False, tree_construction='sparse')
+    vlmc.fit(X)
+    assert np.all(vlmc.count_tree.n_ocurrences > 0)
+    assert vlmc.count_tree.n_nodes < sum(3**l for l in range(5))
+
+
+@pytest.mark.parametrize('source', ['path', 'memmap'])
+def test_out_of_core_fit_matches_in_memory_fit(tmp_path, source):
+    X = generate_sample(3, 6000, seed=12).astype(np.uint8)
+    path = tmp_path / 'codes.bin'
+    X.tofile(path)
+    data = str(path) if source == 'path' else np.memmap(path, dtype=np.uint8, mode='r')
+
+    out_of_core = VLMC(max_order=4, vocabulary=[0, 1, 2])
+    out_of_core.fit(data, block_size=1000)
+    in_memory = VLMC(max_order=4, vocabulary=[0, 1, 2])
+    in_memory.fit(X)
+    assert_same_tree(out_of_core.context_tree, in_memory.context_tree)
+
+
+def test_out_of_core_fit_rejects_codes_outside_vocabulary(tmp_path):
+    path = tmp_path / 'codes.bin'
+    np.array([0, 1, 5, 1], dtype=np.uint8).tofile(path)
+    with pytest.raises(ValueError):
+        VLMC(max_order=2, vocabulary=[0, 1, 2]).fit(str(path))
+
+
+def test_refit_hits_cache():
+    # Admissibility criteria lower max order of tree object below configured order for short samples
+    X = generate_sample(2, 300, seed=15)
+    cache = CountCache()
+    cached = VLMC(max_order=20, vocabulary=[0, 1], cache=cache)
+    for method in ('bic', 'bct', 'context'):
+        cached.fit(X, method=method)
+        assert cached.max_order < 20
+        fitted = VLMC(max_order=20, vocabulary=[0, 1])
+        fitted.fit(X, method=method)
+        assert_same_tree(cached.context_tree, fitted.context_tree)
+    assert (cache.misses, cache.hits, len(cache)) == (1, 2, 1)
+
+
+def test_fit_many_hits_cache():
+    X = generate_sample(3, 300, seed=16)
+    cache = CountCache()
+    vlmc = VLMC(max_order=20, vocabulary=[0, 1, 2], cache=cache)
+    first = vlmc.fit_many(X)
+    second = vlmc.fit_many(X)
+    assert (cache.misses, cache.hits, len(cache)) == (1, 1, 1)
+    for method in first:
+        assert_same_tree(first[method], second[method])
+
+
+def test_multi_character_symbols_are_not_split():
+    # Word 'ab' is also concatenation of symbols 'a' and 'b', which must be counted as different contexts
+    codes = generate_sample(3, 2000, seed=30)
+    vocabulary = ['ab', 'a', 'b']
+    X = [vocabulary[c] for c in codes]
+    vlmc = VLMC(max_order=3, vocabulary=vocabulary, make_admissible=False)
+    vlmc.fit(X)
+    np.testing.assert_array_equal(vlmc.encode(X), codes)
+    fitted = VLMC(max_order=3, vocabulary=[0, 1, 2], make_admissible=False)
+    fitted.fit(codes)
+    assert_same_tree(vlmc.count_tree, fitted.count_tree)
+    tree = vlmc.count_tree
+    for node in range(1, tree.n_nodes):
+        context = [vocabulary[c] for c in tree.get_codes(node)]
+        d = len(context)
+        expected = np.zeros(3, dtype=np.int64)
+        for i in range(d, len(X)):
+            if X[i-d:i] == context:
+                expected[vocabulary.index(X[i])] += 1
+        np.testing.assert_array_equal(tree.transition_counts[node], expected)
+
+
+@pytest.mark.parametrize('X', [['ab', 'a', 'c'], ['ab', 'ba'], np.array([0, 1, 3])])
+def test_encode_rejects_symbols_outside_vocabulary(X):
+    vocabulary = [0, 1, 2] if isinstance(X, np.ndarray) else ['ab', 'a', 'b']
+    vlmc = VLMC(max_order=2, vocabulary=vocabulary)
+    with pytest.raises(ValueError):
+        vlmc.encode(X)
+    with pytest.raises(ValueError):
+        vlmc.fit(X)
+
+
+
+def test_unfitted_tree_raises():
+    vlmc = VLMC(max_order=2, vocabulary=[0, 1])
+    for method in (vlmc.get_all_nodes, vlmc.get_leaves, vlmc.show_tree, vlmc.solve):
+        with pytest.raises(ValueError, match='must be fitted'):
+            method()
+    with pytest.raises(ValueError, match='must be fitted'):
+        vlmc.get_leaf([0])
@@ -2,4 +2,12 @@ from .vlmc import VLMC
 from .bic_solver import BICSolver
 from .context_algorithm_solver import ContextAlgorithmSolver
 from .bct_solver import BCTSolver
-from .counter import Counter
\ No newline at end of file
+from .counter import Counter, AssociationError
+from .kgram_counts import KGramCounts, merge_counts
+from .suffix_array import SuffixArray
+from .context_tree import ContextTree
+from .backend import SerialBackend, ThreadBackend, ProcessBackend
+from .online_counts import OnlineCounts
+from .sketch_counts import SketchCounts
+from .count_cache import CountCache
+from .regularization_path import RegularizationPath
\ No newline at end of file
@@ -0,0 +1,203 @@
+import numpy as np
+
+import multiprocessing
+from multiprocessing import resource_tracker
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from .shared_sample import SharedSample, attach_sample
+
+
+class Backend:
+    """
+        Execution backend for tasks performed over an encoded sample. Tasks are functions called as fn(X, item) for each
+        item, in which X is the sample. Before mapping tasks, sample must be made available to workers with share, which
+        is a context manager.
+    """
+
+    njobs = 1
+
+    @contextmanager
+    def share(
+        self,
+        X
+    ):
+        """
+            Makes sample available to workers. In-process backends use sample as is.
+        """
+        yield np.asarray(X)
+
+    def map(
+        self,
+        fn,
+        items,
+        sample
+    ):
+        """
+            Returns list with fn(X, item) for all items, in which X is the sample obtained from share.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """
+            Releases resources held by backend.
+        """
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(
+        self,
+        exc_type,
+        exc_value,
+        traceback
+    ):
+        self.close()
+        return False
+
+
+class SerialBackend(Backend):
+    """
+        Backend that executes tasks in calling process, one after the other, without any overhead.
+    """
+
+    def map(
+        self,
+        fn,
+        items,
+        sample
+    ):
+        return [fn(sample, item) for item in items]
+
+
+class ThreadBackend(Backend):
+    """
+        Backend that executes tasks in a pool of threads, sharing sample in memory. Pool is created on first use and kept
+        until backend is closed.
+    """
+
+    def __init__(
+        self,
+        njobs
+    ):
+        self.njobs = njobs
+        self.__executor = None
+
+    def map(
+        self,
+        fn,
+        items,
+        sample
+    ):
+        if self.__executor is None:
+            self.__executor = ThreadPoolExecutor(max_workers=self.njobs)
+        return list(self.__executor.map(partial(fn, sample), items))
+
+    def close(self):
+        if self.__executor is not None:
+            self.__executor.shutdown()
+            self.__executor = None
+
+
+class ProcessBackend(Backend):
+    """
+        Backend that executes tasks in a pool of processes. Pool is created on first use and kept until backend is closed,
+        so it can be reused across phases of a fit and across fits. Sample is published in shared memory, and workers attach
+        to it without copies. Items are sent to workers in batches, and each batch attaches to sample once and detaches when
+        it ends, so no worker keeps sample mapped after map returns.
+    """
+
+    # Number of batches per worker in which items are split, for balancing load among workers
+    batches_per_job = 4
+
+
+    def __init__(
+        self,
+        njobs
+    ):
+        self.njobs = njobs
+        self.__pool = None
+
+    @contextmanager
+    def share(
+        self,
+        X
+    ):
+        # Pool is created before sample is published, as forked workers would otherwise inherit mapping of its block
+        self.__get_pool()
+        with SharedSample(X=X) as sample:
+            yield sample
+
+    def __get_pool(self):
+        # Resource tracker of shared memory is started before forking workers, so that they share it with calling process
+        if self.__pool is None:
+            resource_tracker.ensure_running()
+            self.__pool = multiprocessing.Pool(self.njobs)
+        return self.__pool
+
+    @property
+    def pids(self):
+        """
+            Process ids of workers of pool, which is empty if pool has not been created.
+        """
+        if self.__pool is None:
+            return []
+        return [p.pid for p in self.__pool._pool]
+
+    def map(
+        self,
+        fn,
+        items,
+        sample
+    ):
+        items = list(items)
+        batches = [b for b in np.array_split(np.arange(len(items)), self.njobs*self.batches_per_job) if len(b) > 0]
+        results = self.__get_pool().map(
+            partial(_run_tasks, fn, sample.initargs),
+            [[items[i] for i in b] for b in batches]
+        )
+        return [r for batch_results in results for r in batch_results]
+
+    def close(self):
+        if self.__pool is not None:
+            self.__pool.close()
+            self.__pool.join()
+            self.__pool = None
+
+
+def _run_tasks(
+    fn,
+    sample_args,
+    items
+):
+    """
+        Runs batch of tasks in worker process, over sample attached from shared memory while batch runs.
+    """
+    with attach_sample(*sample_args) as X:
+        results = [fn(X, item) for item in items]
+        del X
+    return results
+
+
+def get_backend(
+    backend,
+    njobs
+):
+    """
+        Obtains backend from given argument. Backend can be a Backend object, which is used as is, or one of 'serial', 'thread'
+        or 'process', for which a new backend with njobs workers is created. If backend is None, serial backend is used for
+        njobs=1 and process backend otherwise. Returns backend and flag indicating whether it was created here (and so must be
+        closed by caller).
+    """
+    if isinstance(backend, Backend):
+        return backend, False
+    if backend is None:
+        backend = 'serial' if njobs == 1 else 'process'
+    if backend == 'serial':
+        return SerialBackend(), True
+    if backend == 'thread':
+        return ThreadBackend(njobs=njobs), True
+    if backend == 'process':
+        return ProcessBackend(njobs=njobs), True
+    raise ValueError("Backend must be a Backend object or one of 'serial', 'thread' or 'process'.")
@@ -1,143 +1,121 @@
 import numpy as np
 
-import multiprocessing
-from functools import partial
-from .utils import count_word_ocurrences, count_subword_ocurrences
+from scipy.special import gammaln
+
 
 class BCTSolver:
-    
+
     @classmethod
     def fit(
         cls,
         vlmc,
         X,
-        beta=0.5
+        beta=0.5,
+        n=None
     ):
-        def __get_word_maximal_probs(parent):
-            
-            # If not at leaves, recursively move deeper in tree towards leaves
-            if parent.children is not None:
-                for w in parent.children.values():
-                    __get_word_maximal_probs(parent=w)
-            # If at leaves        
-            else:
-                if np.any(
-                    a=[
-                        c==0 for c in parent.transition_counts.values()
-                    ]
-                ):
-                    P_e = 0
-                else:
-                    
-                    prod_vectors = np.array([
-                        np.array([
-                            i-0.5 for i in range(1,c+1)
-                        ]) for c in parent.transition_counts.values()
-                    ])
-                    
-                    div_vector = np.array([
-                        i-1+(cls.vocabulary_size/2)for i in range(1, parent.n_ocurrences+1)
-                    ])
-                    max_size = len(div_vector)
-                    
-                    prod_vectors = np.array([
-                        np.concatenate(
-                            [v, np.ones(max_size-len(v))]
-                        ) for v in prod_vectors
-                        
-                    ])
-                    
-                    
-                    P_e=0
-                    for i in range(max_size):
-                        P_e += np.sum(
-                            np.log(prod_vectors[:,i])
-                        ) - np.log(div_vector[i])
-                        
-                    
-                parent.P_e=P_e
-                parent.P_m=P_e
-                parent.is_child_P_m=None
-                    
-                return
-            
-            if np.any(
-                a=[
-                    c==0 for c in parent.transition_counts.values()
-                ]
-            ):
-                P_e = 0
-            else:
-                prod_vectors = np.array([
-                    np.array([
-                        i-0.5 for i in range(1,c+1)
-                    ]) for c in parent.transition_counts.values()
-                ])
-
-                div_vector = np.array([
-                    i-1+(cls.vocabulary_size/2)for i in range(1, parent.n_ocurrences+1)
-                ])
-                max_size = len(div_vector)
-
-                prod_vectors = np.array([
-                    np.concatenate(
-                        [v, np.ones(max_size-len(v))]
-                    ) for v in prod_vectors
-
-                ])
-
-
-                P_e=0
-                for i in range(max_size):
-                    P_e += np.sum(
-                        np.log(prod_vectors[:,i])
-                    ) - np.log(div_vector[i])
-                
-
-
-            parent.P_e=P_e
-            
-            P_m_parent = np.log(cls.beta)+parent.P_e
-            P_m_children = np.log(1-cls.beta) + np.sum(
-                [
-                    child.P_m for child in parent.children.values()
-                ]
-            )
-            parent.P_m = max(
-                P_m_parent,
-                P_m_children
-            )
-            parent.is_child_P_m = True if P_m_children>P_m_parent else False
-            
-            return
-        
-        def __trim_tree(parent):
-            
-            if parent.children is not None:
-                for w in parent.children.values():
-                    __trim_tree(parent=w)
-                    
-            else:
-                return
-            
-            if not parent.is_child_P_m:
-                # import pdb;pdb.set_trace()
-                parent.children=None
-                parent.is_leaf=True
-                pass
-            
-            return
-        
         cls.vlmc=vlmc
         cls.X=X
         cls.vocabulary_size=len(cls.vlmc.vocabulary)
         cls.beta=beta
-        cls.n=len(X)
-        
-        __get_word_maximal_probs(parent=cls.vlmc.tree)
-        __trim_tree(parent=cls.vlmc.tree)
-        
-        
-        
-                
-        
\ No newline at end of file
+        cls.n=len(X) if n is None else n
+
+        P_e, P_m, is_child_P_m = cls.__get_word_maximal_probs(
+            tree=cls.vlmc.count_tree,
+            beta=np.array([cls.beta], dtype=float)
+        )
+        cls.P_e, cls.P_m, cls.is_child_P_m = P_e, P_m[0], is_child_P_m[0]
+
+        # Children of a node are kept if maximal probability of node was obtained from its children. Tree of counts is left
+        # intact, and pruned tree is given by mask of kept nodes
+        cls.keep = cls.vlmc.count_tree.get_pruning_mask(
+            keep_children=cls.is_child_P_m
+        )
+        cls.vlmc.context_tree = cls.vlmc.count_tree.select(cls.keep)
+
+        return cls.keep
+
+    @classmethod
+    def fit_path(
+        cls,
+        vlmc,
+        parameter,
+        values
+    ):
+        """
+            Obtains masks of nodes of tree of counts kept by solver for each of values of parameter, in a single pass from the
+            leaves towards the root in which all values are processed at once, one depth at a time. Args:
+                - vlmc (VLMC): tree object whose tree of counts is pruned.
+                - parameter (string): parameter of solver that is varied, which can only be 'beta' (prior probability of a
+                node being a leaf).
+                - values (array): values of parameter, in interval (0, 1).
+            Returns (values x nodes) array of masks.
+        """
+
+        if parameter != 'beta':
+            raise ValueError("Path of BCT solver can only be obtained over 'beta'.")
+
+        cls.vocabulary_size = len(vlmc.vocabulary)
+        _, _, is_child_P_m = cls.__get_word_maximal_probs(
+            tree=vlmc.count_tree,
+            beta=np.asarray(values, dtype=float)
+        )
+
+        return vlmc.count_tree.get_pruning_mask(
+            keep_children=is_child_P_m
+        )
+
+    @classmethod
+    def __get_word_maximal_probs(
+        cls,
+        tree,
+        beta
+    ):
+        """
+            Method to estimate estimated and maximal probabilities P_e and P_m for all nodes, in logarithms, for each of
+            values of beta. Levels are visited from the deepest towards the root, so children are always visited before
+            their parents, and all nodes of a level (for all values of beta) are processed at once. Returns P_e for each
+            node, and (values x nodes) arrays of P_m and of flags of nodes whose P_m was obtained from their children.
+        """
+
+        beta = beta[:, None]
+        P_e = cls.__get_estimated_probs(tree=tree)
+
+        # Maximal probability of a leaf is its estimated probability; for an internal node, it is obtained either from its
+        # own estimated probability or from maximal probabilities of its children
+        P_m = np.repeat(P_e[None, :], len(beta), axis=0)
+        is_child_P_m = np.zeros(P_m.shape, dtype=bool)
+        with np.errstate(divide='ignore'):
+            log_beta, log_1_beta = np.log(beta), np.log(1-beta)
+        for l in range(tree.max_depth, 0, -1):
+            level = tree.get_level(l-1)
+            is_internal = tree.n_children[level] > 0
+            P_m_parent = log_beta+P_e[level]
+            P_m_children = log_1_beta+tree.reduce_children(P_m, depth=l)
+            is_child_P_m[:, level] = is_internal & (P_m_children > P_m_parent)
+            P_m[:, level] = np.where(
+                is_internal,
+                np.maximum(P_m_parent, P_m_children),
+                P_e[level]
+            )
+
+        return P_e, P_m, is_child_P_m
+
+    @classmethod
+    def __get_estimated_probs(
+        cls,
+        tree
+    ):
+        """
+            Logarithm of estimated probability P_e of each node, given by Krichevsky-Trofimov estimator of its transition
+            counts a_j, with M = sum of a_j:
+                P_e = prod_j [Gamma(a_j + 1/2) / Gamma(1/2)] / [Gamma(M + |V|/2) / Gamma(|V|/2)]
+            Symbols that never follow a node contribute a factor of one, so factors are only obtained for stored transitions
+            (for all nodes at once), and summed in logarithms into their nodes.
+        """
+
+        half_vocabulary_size = cls.vocabulary_size/2
+        counts = tree.transition_count
+        P_e = tree.reduce_transitions(gammaln(counts+0.5) - gammaln(0.5))
+        P_e -= gammaln(tree.reduce_transitions(counts)+half_vocabulary_size) - gammaln(half_vocabulary_size)
+
+        return P_e
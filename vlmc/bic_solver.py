@@ -1,91 +1,106 @@
 import numpy as np
 
-import multiprocessing
-from functools import partial
-from .utils import count_word_ocurrences, count_subword_ocurrences
 
 class BICSolver:
-    
+
     @classmethod
     def fit(
         cls,
         vlmc,
-        X
+        X,
+        n=None,
+        penalty=None
     ):
-        def __get_word_V_chi(parent):
-            """
-                Recursive method to estimate values for V and indicator function chi. These values will be used
-                to estimate tree with minimum BIC. Due to orders of magnitude involved, which may be below computational
-                representation for some nodes depending on tree max depth, logarithms are used for V's.
-            """
-            
-            # If not at leaves, recursively move deeper in tree towards leaves
-            if parent.children is not None:
-                for w in parent.children.values():
-                    __get_word_V_chi(parent=w)
-            # If at leaves    
-            else:
-                # V for leaves is calculated from its own transition counts and probabilities.
-                parent.V = np.sum([
-                    c*np.log(c/parent.n_ocurrences) for c in parent.transition_counts.values() if c >=1
-                ]) + cls.adj_factor
-                
-                # Chi for leaves is zero
-                parent.chi = 0
-                return
-            
-            # Calculate candidate for V in parent
-            L_parent = np.sum([
-                c*np.log(c/parent.n_ocurrences) for c in parent.transition_counts.values() if c >=1
-            ]) + cls.adj_factor
-            
-            # Calculate product (log-sum) of V's in children 
-            V_children = np.sum([
-                child.V for child in parent.children.values()
-            ])
-            
-            # V in parent is the maximum between candidate value at parent node and
-            # product (log-sum) in children
-            parent.V = max(
-                L_parent,
-                V_children
-            )
-            
-            # Define chi according to value which was maximum for obtaining parent V
-            parent.chi = 1 if V_children > L_parent else 0
-            
-            return
-        
-        def __trim_tree(parent):
-            """
-                Method that performs trimming according to rule for chi: a node's children will be kept if all children's values for
-                chi are zero, and also node and all up to root have chi=1. Movement in tree is done recursively.
-            """
-            
-            #If node has chi=1, move towards leaves
-            if parent.chi==1:
-                for w in parent.children.values():
-                    __trim_tree(parent=w)
-            # If node has chi=0, trim all its descendants.
-            else:
-                parent.children=None
-                parent.is_leaf=True
-                return
-            
-            return
-        
         cls.vlmc=vlmc
         cls.X=X
-        cls.n=len(X)
-        cls.adj_factor = np.log(cls.n)*(-(len(cls.vlmc.vocabulary)-1)/2)
-        
+        cls.n=len(X) if n is None else n
+        cls.adj_factor = np.log(cls.n)*(-(len(cls.vlmc.vocabulary)-1)/2) if penalty is None else -penalty
+
         # Get values of V and indicator function chi
-        __get_word_V_chi(parent=cls.vlmc.tree)
-        
-        # Trim tree according to rules regarding indicator function chi
-        __trim_tree(parent=cls.vlmc.tree)
-        
-        
-        
-                
-        
\ No newline at end of file
+        V, chi = cls.__get_word_V_chi(
+            tree=cls.vlmc.count_tree,
+            penalty=np.array([-cls.adj_factor], dtype=float)
+        )
+        cls.V, cls.chi = V[0], chi[0].astype(np.int64)
+
+        # Trim tree according to rule for chi: a node's children will be kept if node and all up to root have chi=1. Tree of
+        # counts is left intact, and pruned tree is given by mask of kept nodes
+        cls.keep = cls.vlmc.count_tree.get_pruning_mask(
+            keep_children=cls.chi==1
+        )
+        cls.vlmc.context_tree = cls.vlmc.count_tree.select(cls.keep)
+
+        return cls.keep
+
+    @classmethod
+    def fit_path(
+        cls,
+        vlmc,
+        parameter,
+        values
+    ):
+        """
+            Obtains masks of nodes of tree of counts kept by solver for each of values of parameter, in a single pass from the
+            leaves towards the root in which all values are processed at once, one depth at a time. Args:
+                - vlmc (VLMC): tree object whose tree of counts is pruned.
+                - parameter (string): parameter of solver that is varied, which can only be 'penalty' (penalty of each
+                context in log-likelihood, which is (|V|-1)/2 log(n) in BIC).
+                - values (array): values of parameter.
+            Returns (values x nodes) array of masks.
+        """
+
+        if parameter != 'penalty':
+            raise ValueError("Path of BIC solver can only be obtained over 'penalty'.")
+
+        _, chi = cls.__get_word_V_chi(
+            tree=vlmc.count_tree,
+            penalty=np.asarray(values, dtype=float)
+        )
+
+        return vlmc.count_tree.get_pruning_mask(
+            keep_children=chi
+        )
+
+    @classmethod
+    def __get_word_V_chi(
+        cls,
+        tree,
+        penalty
+    ):
+        """
+            Method to estimate values for V and indicator function chi, for each of values of penalty. These values will be
+            used to estimate tree with minimum BIC. Due to orders of magnitude involved, which may be below computational
+            representation for some nodes depending on tree max depth, logarithms are used for V's. Levels are visited from
+            the deepest towards the root, so children are always visited before their parents, and all nodes of a level
+            (for all values of penalty) are processed at once. Returns (values x nodes) arrays of V and chi.
+        """
+
+        # Candidate for V in each node, from its own transition counts and probabilities
+        L_node = cls.__get_log_likelihoods(tree=tree)[None, :] - penalty[:, None]
+
+        # V for leaves is candidate value, and chi for leaves is zero. V in internal nodes is the maximum between candidate
+        # value at node and product (log-sum) of V's in children, and chi is one if the latter is greater
+        V = L_node.copy()
+        chi = np.zeros(V.shape, dtype=bool)
+        for l in range(tree.max_depth, 0, -1):
+            level = tree.get_level(l-1)
+            V_children = tree.reduce_children(V, depth=l)
+            chi[:, level] = (tree.n_children[level] > 0) & (V_children > L_node[:, level])
+            V[:, level] = np.where(chi[:, level], V_children, L_node[:, level])
+
+        return V, chi
+
+    @classmethod
+    def __get_log_likelihoods(
+        cls,
+        tree
+    ):
+        """
+            Maximum log-likelihood of transitions from each node, from its transition counts. Terms c log(c/n) are obtained
+            for all transitions of tree at once and summed into their nodes; transitions that never happen are not stored,
+            as they contribute zero.
+        """
+        counts = tree.transition_count
+        with np.errstate(divide='ignore'):
+            terms = counts*np.log(counts/tree.n_ocurrences[tree.transition_node])
+        return tree.reduce_transitions(terms)
@@ -1,83 +1,168 @@
 import numpy as np
 
-import multiprocessing
-from functools import partial
-from .utils import count_word_ocurrences, count_subword_ocurrences
 
 class ContextAlgorithmSolver:
-    
+
     @classmethod
     def fit(
         cls,
         vlmc,
         X,
         alpha=1/16,
-        beta=1
+        beta=1,
+        child_count_admissible=False
     ):
-        def __get_word_delta(parent):
-            
-            if parent.children is not None:
-                for w in parent.children.values():
-                    __get_word_delta(parent=w)
-                    
-            else:
-                parent.delta=None
-                return
-
-            L_parent = (parent.n_ocurrences/cls.n)*np.sum([
-                (c/parent.n_ocurrences)*np.log(c/parent.n_ocurrences) for b, c in parent.transition_counts.items() if c>0
-            ])
-            
-            L_children = np.sum([
-                (child.n_ocurrences/cls.n)*np.sum([
-                    (c/child.n_ocurrences)*np.log(c/child.n_ocurrences) for b, c in child.transition_counts.items() if c>0
-                ]) for child in parent.children.values() if child.n_ocurrences>0
-            ])
-            
-            parent.delta = L_children-L_parent
-            
-            return
-        
-        def __trim_tree(parent):
-            
-            if parent.children is not None:
-                keep_children_children = []
-                for w in parent.children.values():
-                    keep_children_children.append(__trim_tree(parent=w))
-                keep_children=np.any(keep_children_children)
-            else:
-                return False
-            
-            if keep_children:
-                return True
-            if not keep_children:
-                word_len_admissible = True if len(parent.word) <= cls.beta*np.log(cls.n) else False
-                child_count_admissible = True if min([
-                    c_wa for c_wa in parent.transition_counts.values()
-                ]) > 2*cls.alpha*cls.n/np.log(cls.n) else False
-                
-                # child_count_admissible=True
-                delta_admissible = True if parent.delta > np.log(cls.n)/cls.n else False
-                # import pdb;pdb.set_trace()
-                # if not (word_len_admissible and child_count_admissible and delta_admissible):
-                if not (delta_admissible and word_len_admissible):
-                    parent.children=None
-                    parent.is_leaf=True
-                    return False
-                else:
-                    return True
-                
-        
         cls.vlmc=vlmc
         cls.X=X
-        cls.n=vlmc.tree.n_ocurrences
+        cls.n=vlmc.count_tree.n_ocurrences[0]
         cls.alpha=alpha
         cls.beta=beta
-        
-        __get_word_delta(parent=cls.vlmc.tree)
-        __trim_tree(parent=cls.vlmc.tree)
-        
-        
-        
-                
-        
\ No newline at end of file
+        cls.child_count_admissible=child_count_admissible
+
+        cls.delta = cls.__get_word_delta(tree=cls.vlmc.count_tree)
+        cls.keep_children = cls.__get_keep_children(
+            tree=cls.vlmc.count_tree,
+            alpha=np.array([cls.alpha], dtype=float),
+            beta=np.array([cls.beta], dtype=float)
+        )[0]
+
+        # Tree of counts is left intact, and pruned tree is given by mask of kept nodes
+        cls.keep = cls.vlmc.count_tree.get_pruning_mask(
+            keep_children=cls.keep_children
+        )
+        cls.vlmc.context_tree = cls.vlmc.count_tree.select(cls.keep)
+
+        return cls.keep
+
+    @classmethod
+    def fit_path(
+        cls,
+        vlmc,
+        parameter,
+        values,
+        alpha=1/16,
+        beta=1,
+        child_count_admissible=False
+    ):
+        """
+            Obtains masks of nodes of tree of counts kept by solver for each of values of parameter, with other parameters
+            fixed, in a single pass from the leaves towards the root in which all values are processed at once, one depth
+            at a time. Args:
+                - vlmc (VLMC): tree object whose tree of counts is pruned.
+                - parameter (string): parameter of solver that is varied, either 'alpha' or 'beta'.
+                - values (array): values of parameter.
+                - alpha, beta (float), child_count_admissible (boolean): values of parameters that are not varied.
+            Returns (values x nodes) array of masks.
+        """
+
+        if parameter not in ('alpha', 'beta'):
+            raise ValueError("Path of Context Algorithm solver can only be obtained over 'alpha' or 'beta'.")
+
+        tree = vlmc.count_tree
+        cls.n = tree.n_ocurrences[0]
+        cls.child_count_admissible = child_count_admissible
+        cls.delta = cls.__get_word_delta(tree=tree)
+
+        values = np.asarray(values, dtype=float)
+        keep_children = cls.__get_keep_children(
+            tree=tree,
+            alpha=values if parameter=='alpha' else np.full(len(values), alpha, dtype=float),
+            beta=values if parameter=='beta' else np.full(len(values), beta, dtype=float)
+        )
+
+        return tree.get_pruning_mask(
+            keep_children=keep_children
+        )
+
+    @classmethod
+    def __get_word_entropy_terms(
+        cls,
+        tree
+    ):
+        """
+            Contribution of each node to empirical conditional entropy, from its transition counts, with terms of all
+            transitions of tree obtained at once. Nodes without ocurrences contribute zero.
+        """
+
+        # Transitions of contexts without ocurrences (which may still have transitions from head of sample) are left out
+        # before dividing by their ocurrences
+        n_ocurrences = tree.n_ocurrences[tree.transition_node]
+        probabilities = tree.transition_count/np.where(n_ocurrences > 0, n_ocurrences, 1)
+        terms = np.where(n_ocurrences > 0, probabilities*np.log(probabilities), 0)
+        return (tree.n_ocurrences/cls.n)*tree.reduce_transitions(terms)
+
+    @classmethod
+    def __get_word_delta(
+        cls,
+        tree
+    ):
+        """
+            Difference between entropy terms of children and node, for all internal nodes (NaN for leaves). Entropy terms of
+            children are summed into their parents one depth at a time.
+        """
+
+        entropy_terms = cls.__get_word_entropy_terms(tree=tree)
+        delta = np.full(tree.n_nodes, np.nan)
+        for l in range(1, tree.max_depth+1):
+            level = tree.get_level(l-1)
+            is_internal = tree.n_children[level] > 0
+            delta[level] = np.where(
+                is_internal,
+                tree.reduce_children(entropy_terms, depth=l) - entropy_terms[level],
+                np.nan
+            )
+
+        return delta
+
+    @classmethod
+    def __get_keep_children(
+        cls,
+        tree,
+        alpha,
+        beta
+    ):
+        """
+            A node keeps its children if any of its children keeps its own children, or if node passes the admissibility
+            criteria: its word length is at most beta log(n), its delta is greater than log(n)/n and, if child count
+            criterion is required, each symbol follows it more than 2 alpha n/log(n) times. Criteria are evaluated for all
+            nodes and values of alpha and beta at once, and flags of children are propagated to their parents from the
+            deepest level towards the root. Returns (values x nodes) array of flags.
+        """
+
+        log_n = np.log(cls.n)
+        alpha, beta = alpha[:, None], beta[:, None]
+
+        word_len_admissible = tree.depth[None, :] <= beta*log_n
+        with np.errstate(invalid='ignore'):
+            delta_admissible = cls.delta > log_n/cls.n
+        keep_children = word_len_admissible & delta_admissible & (tree.n_children > 0)
+        if cls.child_count_admissible:
+            keep_children &= cls.__get_min_transition_counts(tree=tree)[None, :] > 2*alpha*cls.n/log_n
+        keep_children = np.broadcast_to(keep_children, (len(alpha), tree.n_nodes)).copy()
+
+        for l in range(tree.max_depth, 0, -1):
+            level = tree.get_level(l-1)
+            keep_children[:, level] |= tree.reduce_children(keep_children, depth=l, ufunc=np.logical_or)
+
+        return keep_children
+
+    @classmethod
+    def __get_min_transition_counts(
+        cls,
+        tree
+    ):
+        """
+            Min number of transitions from each node to any symbol in vocabulary, which is zero unless all symbols follow
+            node. Transitions of each node are contiguous, so they are reduced from position of first transition of nodes
+            that have any.
+        """
+        n_transitions = np.diff(tree.transition_offsets)
+        has_transitions = n_transitions > 0
+        min_counts = np.zeros(tree.n_nodes, dtype=np.int64)
+        if np.any(has_transitions):
+            min_counts[has_transitions] = np.minimum.reduceat(
+                tree.transition_count,
+                tree.transition_offsets[:-1][has_transitions]
+            )
+        min_counts[n_transitions < len(tree.vocabulary)] = 0
+        return min_counts
@@ -0,0 +1,645 @@
+import numpy as np
+
+from .word import WordView
+from .kgram_counts import get_level_transitions
+
+
+class ContextTree:
+    """
+        Context tree represented by contiguous arrays, with one entry (or row) per node. Nodes are stored in level order:
+        the root is node 0, nodes of same depth are contiguous, and children of a node are contiguous and sorted by symbol.
+        For each node, arrays keep:
+            - parent: index of parent node (-1 for root).
+            - first_child: index of first child (-1 for leaves).
+            - n_children: number of children.
+            - depth: length of context.
+            - symbol: code of oldest symbol in context, which is the one that distinguishes node from its parent (-1 for root).
+            - n_ocurrences: number of ocurrences of context.
+        Number of transitions from each context to each symbol in vocabulary are only stored for symbols that follow it, in
+        compressed sparse rows, so that memory scales with number of distinct transitions instead of nodes x |V|:
+            - transition_offsets: position of first transition of each node (plus total number of transitions at the end).
+            - transition_symbol: code of symbol of each transition. Transitions of a node are sorted by symbol.
+            - transition_count: number of ocurrences of each transition.
+        Dense (nodes x |V|) matrix of transition counts is obtained on access (see transition_counts and
+        get_transition_counts).
+        Trees are never modified in place by pruning; select returns a new, compacted tree, so a tree of counts can be pruned
+        several times.
+
+        All walks over the tree are iterative: level order is given by the arrays themselves, so bottom-up and top-down
+        passes visit one depth at a time, and depth-first (pre-order and post-order) index arrays are computed on first use
+        (see preorder and postorder). No operation recurses, so tree depth is only bounded by memory.
+    """
+
+    # Min average number of nodes per depth for depth-first arrays to be obtained one depth at a time
+    min_level_width = 64
+
+    # Max number of entries of dense table of children used to associate samples to leaves
+    max_children_table_size = 2**26
+
+    def __init__(
+        self,
+        parent,
+        symbol,
+        n_ocurrences,
+        transition_counts,
+        vocabulary,
+        transitions=None
+    ):
+        """
+            Class constructor method. Args:
+                - parent (array): index of parent of each node, for nodes in level order.
+                - symbol (array): code of oldest symbol of each node.
+                - n_ocurrences (array): number of ocurrences of each node.
+                - transition_counts (array): (nodes x |V|) matrix of transition counts. Ignored if transitions are given.
+                - vocabulary (array): array of symbols that are the vocabulary for the tree.
+                - transitions (tuple): arrays (node, symbol, count) with transition counts given sparsely, sorted by node
+                and symbol, which are used instead of a dense matrix.
+        """
+        self.vocabulary = vocabulary
+        self.vocabulary_str = [str(s) for s in vocabulary]
+        self.parent = np.asarray(parent, dtype=np.int64)
+        self.symbol = np.asarray(symbol, dtype=np.int64)
+        self.n_ocurrences = np.asarray(n_ocurrences, dtype=np.int64)
+        if transitions is None:
+            transition_counts = np.asarray(transition_counts, dtype=np.int64).reshape(len(self.parent), len(vocabulary))
+            nonzero = np.nonzero(transition_counts)
+            transitions = nonzero + (transition_counts[nonzero],)
+        self.__set_transitions(*transitions)
+
+        # Position of first node of each depth. In level order, parent indexes are sorted, so each level ends
+        # right before the first node whose parent is past the previous level
+        n_nodes = len(self.parent)
+        level_offsets = [0, 1]
+        while level_offsets[-1] < n_nodes:
+            level_offsets.append(int(np.searchsorted(self.parent, level_offsets[-1])))
+        self.level_offsets = np.array(level_offsets)
+        self.depth = np.repeat(
+            np.arange(len(level_offsets)-1),
+            np.diff(self.level_offsets)
+        )
+
+        # Children of each node are contiguous, so they are located by position of node in (sorted) parent array
+        self.n_children = np.bincount(self.parent[1:], minlength=n_nodes).astype(np.int64)
+        self.first_child = np.where(
+            self.n_children > 0,
+            np.searchsorted(self.parent[1:], np.arange(n_nodes))+1,
+            -1
+        )
+
+        # Depth-first traversal arrays and leaves are only computed when required
+        self.__subtree_size = None
+        self.__preorder_position = None
+        self.__leaves = None
+
+    @classmethod
+    def from_kgram_counts(
+        cls,
+        kgram_counts,
+        vocabulary,
+        full=False
+    ):
+        """
+            Builds tree from levels of k-gram counts. If full is False, only contexts with ocurrences are created. If full is
+            True, all |V|^l possible contexts are created for each depth l up to max order of counts, with zero counts for
+            contexts that do not appear in sample.
+        """
+
+        V = len(vocabulary)
+        parents, symbols, n_ocurrences = [], [], []
+        transition_nodes, transition_symbols, transition_counts = [], [], []
+        level_index = np.zeros(1, dtype=np.int64)
+        offset, first = 0, 0
+        for l, level in enumerate(kgram_counts.levels):
+            if l == 0:
+                size = 1
+                index = np.zeros(1, dtype=np.int64)
+                parents.append(np.array([-1]))
+                symbols.append(np.array([-1]))
+                n_ocurrences.append(level['n_ocurrences'])
+            elif full:
+                # All words of depth l, indexed by parent index and symbol
+                size = V**l
+                index = level_index[level['parent']]*V + level['symbol']
+                level_n_ocurrences = np.zeros(size, dtype=np.int64)
+                level_n_ocurrences[index] = level['n_ocurrences']
+                parents.append(offset + np.arange(size)//V)
+                symbols.append(np.arange(size) % V)
+                n_ocurrences.append(level_n_ocurrences)
+            else:
+                # Only contexts with ocurrences (whose parents also have ocurrences)
+                keep = level['n_ocurrences'] > 0
+                size = int(np.sum(keep))
+                index = np.full(len(keep), -1, dtype=np.int64)
+                index[keep] = np.arange(size)
+                parents.append(offset + level_index[level['parent'][keep]])
+                symbols.append(level['symbol'][keep])
+                n_ocurrences.append(level['n_ocurrences'][keep])
+
+            # Transitions of contexts that are created are moved to their nodes. Indexes of contexts are increasing, so
+            # transitions stay sorted by node
+            rows, row_symbols, row_counts = get_level_transitions(level)
+            is_created = index[rows] >= 0
+            transition_nodes.append(first + index[rows[is_created]])
+            transition_symbols.append(row_symbols[is_created])
+            transition_counts.append(row_counts[is_created])
+
+            level_index = index
+            offset, first = first, first+size
+
+        return cls(
+            parent=np.concatenate(parents),
+            symbol=np.concatenate(symbols),
+            n_ocurrences=np.concatenate(n_ocurrences),
+            transition_counts=None,
+            vocabulary=vocabulary,
+            transitions=(
+                np.concatenate(transition_nodes),
+                np.concatenate(transition_symbols),
+                np.concatenate(transition_counts)
+            )
+        )
+
+    @classmethod
+    def full(
+        cls,
+        max_order,
+        vocabulary
+    ):
+        """
+            Builds tree with all |V|^l possible words for each depth l up to max_order, with zero counts.
+        """
+        V = len(vocabulary)
+        parents, symbols = [np.array([-1])], [np.array([-1])]
+        offset = 0
+        for l in range(1, max_order+1):
+            parents.append(offset + np.arange(V**l)//V)
+            symbols.append(np.arange(V**l) % V)
+            offset += V**(l-1)
+        n_nodes = offset + V**max_order if max_order > 0 else 1
+        return cls(
+            parent=np.concatenate(parents),
+            symbol=np.concatenate(symbols),
+            n_ocurrences=np.zeros(n_nodes, dtype=np.int64),
+            transition_counts=None,
+            vocabulary=vocabulary,
+            transitions=(np.zeros(0, dtype=np.int64),)*3
+        )
+
+    @property
+    def n_nodes(self):
+        return len(self.parent)
+
+    @property
+    def max_depth(self):
+        return int(self.depth[-1])
+
+    @property
+    def nbytes(self):
+        """
+            Total size, in bytes, of arrays of tree.
+        """
+        return sum(a.nbytes for a in (
+            self.parent, self.symbol, self.n_ocurrences, self.transition_offsets, self.transition_symbol,
+            self.transition_count, self.level_offsets, self.depth, self.n_children, self.first_child
+        ))
+
+    @property
+    def is_leaf(self):
+        return self.n_children == 0
+
+    @property
+    def leaves(self):
+        """
+            Indexes of leaves, in level order. Structure of a tree is never modified, so they are cached on first use.
+        """
+        if self.__leaves is None:
+            self.__leaves = np.flatnonzero(self.is_leaf)
+            self.__leaves.flags.writeable = False
+        return self.__leaves
+
+    @property
+    def transition_node(self):
+        """
+            Index of node of each transition.
+        """
+        return np.repeat(
+            np.arange(self.n_nodes),
+            np.diff(self.transition_offsets)
+        )
+
+    @property
+    def transition_counts(self):
+        """
+            Dense (nodes x |V|) matrix of transition counts, which is built on each access. For large vocabularies, prefer
+            get_transition_counts for some nodes, or arrays of sparse transitions.
+        """
+        return self.get_transition_counts(np.arange(self.n_nodes))
+
+    def get_transition_counts(
+        self,
+        nodes
+    ):
+        """
+            Returns dense (nodes x |V|) matrix with transition counts of given nodes, or array with transition counts of a
+            single node if an index is given.
+        """
+        nodes = np.asarray(nodes, dtype=np.int64)
+        rows = nodes.reshape(-1)
+        start = self.transition_offsets[rows]
+        length = self.transition_offsets[rows+1] - start
+
+        # Transitions of each node are a range from its first transition, so ranges of all nodes are concatenated by
+        # shifting a single arange
+        positions = np.arange(np.sum(length)) + np.repeat(start - np.cumsum(length) + length, length)
+        counts = np.zeros((len(rows), len(self.vocabulary)), dtype=np.int64)
+        counts[np.repeat(np.arange(len(rows)), length), self.transition_symbol[positions]] = self.transition_count[positions]
+        return counts.reshape(nodes.shape + (len(self.vocabulary),))
+
+    def set_transition_counts(
+        self,
+        nodes,
+        counts
+    ):
+        """
+            Replaces transition counts of given nodes by rows of dense (nodes x |V|) matrix counts.
+        """
+        nodes = np.asarray(nodes, dtype=np.int64).reshape(-1)
+        counts = np.asarray(counts, dtype=np.int64).reshape(len(nodes), len(self.vocabulary))
+        order = np.argsort(nodes, kind='stable')
+        nodes, counts = nodes[order], counts[order]
+
+        # Transitions of other nodes stay sorted, and new transitions of each node are inserted where its node belongs
+        node = self.transition_node
+        is_kept = ~np.isin(node, nodes)
+        rows, symbols = np.nonzero(counts)
+        position = np.searchsorted(node[is_kept], nodes[rows])
+        self.__set_transitions(
+            np.insert(node[is_kept], position, nodes[rows]),
+            np.insert(self.transition_symbol[is_kept], position, symbols),
+            np.insert(self.transition_count[is_kept], position, counts[rows, symbols])
+        )
+
+    def reduce_transitions(
+        self,
+        values
+    ):
+        """
+            Sums values given for each transition (along last axis) over transitions of each node. Returns array with one
+            entry per node along last axis, which is zero for nodes without transitions.
+        """
+        values = np.asarray(values)
+        has_transitions = np.diff(self.transition_offsets) > 0
+        reduced = np.zeros(values.shape[:-1] + (self.n_nodes,), dtype=values.dtype)
+        if np.any(has_transitions):
+            # Transitions of each node are contiguous, and nodes without transitions are skipped
+            reduced[..., has_transitions] = np.add.reduceat(
+                values,
+                self.transition_offsets[:-1][has_transitions],
+                axis=-1
+            )
+        return reduced
+
+    def __set_transitions(
+        self,
+        node,
+        symbol,
+        count
+    ):
+        """
+            Stores transitions given by arrays of node, symbol and count, sorted by node and symbol. Transitions that never
+            happen are dropped.
+        """
+        count = np.asarray(count, dtype=np.int64)
+        happens = count != 0
+        node = np.asarray(node, dtype=np.int64)[happens]
+        self.transition_offsets = np.r_[0, np.cumsum(np.bincount(node, minlength=len(self.parent)))].astype(np.int64)
+        self.transition_symbol = np.asarray(symbol, dtype=np.int64)[happens]
+        self.transition_count = count[happens]
+
+    @property
+    def transition_probabilities(self):
+        """
+            (nodes x |V|) matrix of transition probabilities, estimated from counts.
+        """
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self.transition_counts/self.n_ocurrences[:, None]
+
+    def get_level(
+        self,
+        depth
+    ):
+        """
+            Returns slice of nodes with given depth.
+        """
+        return slice(self.level_offsets[depth], self.level_offsets[depth+1])
+
+    def get_children(
+        self,
+        node
+    ):
+        """
+            Returns range of indexes of children of node.
+        """
+        return range(self.first_child[node], self.first_child[node]+self.n_children[node]) if self.n_children[node] > 0 else range(0)
+
+    @property
+    def is_narrow(self):
+        """
+            Flags trees with less than min_level_width nodes per depth on average (e.g. very deep trees), whose depth-first
+            arrays are obtained with an explicit stack, as passes one depth at a time would be dominated by their per-depth
+            overhead.
+        """
+        return self.n_nodes < self.min_level_width*(self.max_depth+1)
+
+    @property
+    def subtree_size(self):
+        """
+            Number of nodes in subtree of each node (including node itself), summed from the deepest level towards the root,
+            or, for narrow trees, from the last node in pre-order towards the first.
+        """
+        if self.__subtree_size is None:
+            size = np.ones(self.n_nodes, dtype=np.int64)
+            if self.is_narrow:
+                size = size.tolist()
+                parent = self.parent.tolist()
+                for node in self.preorder[:0:-1].tolist():
+                    size[parent[node]] += size[node]
+                size = np.array(size, dtype=np.int64)
+            else:
+                for l in range(self.max_depth, 0, -1):
+                    size[self.get_level(l-1)] += self.reduce_children(size, depth=l)
+            self.__subtree_size = size
+        return self.__subtree_size
+
+    @property
+    def preorder_position(self):
+        """
+            Position of each node in depth-first pre-order, in which each node comes before its subtree and children are
+            visited by symbol. Position of a child is the position of its parent plus one plus sizes of subtrees of its
+            previous siblings, so positions are obtained one depth at a time from the root. Narrow trees are walked with an
+            explicit stack instead.
+        """
+        if (self.__preorder_position is None) and self.is_narrow:
+            first_child, n_children = self.first_child.tolist(), self.n_children.tolist()
+            order = []
+            stack = [0]
+            while stack:
+                node = stack.pop()
+                order.append(node)
+                stack.extend(range(first_child[node]+n_children[node]-1, first_child[node]-1, -1))
+            position = np.empty(self.n_nodes, dtype=np.int64)
+            position[order] = np.arange(self.n_nodes)
+            self.__preorder_position = position
+
+        if self.__preorder_position is None:
+            size = self.subtree_size
+            position = np.zeros(self.n_nodes, dtype=np.int64)
+            for l in range(1, self.max_depth+1):
+                level = self.get_level(l)
+                parent = self.parent[level]
+
+                # Sizes of previous siblings are an exclusive cumulative sum restarted at first child of each parent
+                cumulative = np.cumsum(size[level]) - size[level]
+                first = self.first_child[parent] - self.level_offsets[l]
+                position[level] = position[parent] + 1 + cumulative - cumulative[first]
+            self.__preorder_position = position
+        return self.__preorder_position
+
+    @property
+    def preorder(self):
+        """
+            Indexes of nodes in depth-first pre-order (parents before their subtrees).
+        """
+        order = np.empty(self.n_nodes, dtype=np.int64)
+        order[self.preorder_position] = np.arange(self.n_nodes)
+        return order
+
+    @property
+    def postorder(self):
+        """
+            Indexes of nodes in depth-first post-order (subtrees before their parents). Nodes that finish before a node are
+            those before it in pre-order, except its ancestors, plus its descendants.
+        """
+        order = np.empty(self.n_nodes, dtype=np.int64)
+        order[self.preorder_position - self.depth + self.subtree_size - 1] = np.arange(self.n_nodes)
+        return order
+
+    def clear_cache(self):
+        """
+            Drops cached depth-first traversal arrays and leaves, which are computed again on next use (e.g. to measure their
+            computation).
+        """
+        self.__subtree_size = None
+        self.__preorder_position = None
+        self.__leaves = None
+
+    def get_codes_matrix(
+        self,
+        nodes
+    ):
+        """
+            Returns (nodes x depth) matrix with codes of contexts of given nodes, in chronological order, padded with -1
+            after the end of contexts shorter than the deepest one. Ancestors of all nodes are visited at once, one depth at
+            a time.
+        """
+        nodes = np.asarray(nodes, dtype=np.int64)
+        depth = self.depth[nodes]
+        width = int(np.max(depth)) if len(nodes) > 0 else 0
+        codes = np.full((len(nodes), width), -1, dtype=np.int64)
+        ancestors = nodes.copy()
+        for j in range(width):
+            has_code = depth > j
+            codes[has_code, j] = self.symbol[ancestors[has_code]]
+            ancestors[has_code] = self.parent[ancestors[has_code]]
+        return codes
+
+    def get_all_codes(
+        self,
+        nodes
+    ):
+        """
+            Returns list with tuple of codes of context of each of given nodes, in chronological order (see get_codes).
+        """
+        return [
+            tuple(row[:d]) for row, d in zip(self.get_codes_matrix(nodes).tolist(), self.depth[nodes].tolist())
+        ]
+
+    def get_codes(
+        self,
+        node
+    ):
+        """
+            Returns tuple of codes of context represented by node, in chronological order.
+        """
+        codes = []
+        while node > 0:
+            codes.append(int(self.symbol[node]))
+            node = self.parent[node]
+        return tuple(codes)
+
+    def get_word(
+        self,
+        node
+    ):
+        """
+            Returns concatenation of symbols of context represented by node, used for display.
+        """
+        if node == 0:
+            return 'root'
+        return ''.join([self.vocabulary_str[c] for c in self.get_codes(node)])
+
+    def view(
+        self,
+        node
+    ):
+        """
+            Returns Word-like view of node.
+        """
+        return WordView(
+            tree=self,
+            node=node
+        )
+
+    def associate(
+        self,
+        X,
+        start=None
+    ):
+        """
+            Maps positions of encoded sample X to the leaf whose context precedes them, descending the tree for all positions
+            at once, one depth at a time. Descent uses a dense (nodes x |V|) table of children, in which leaves point to
+            themselves and missing children point to a sink, so each depth is a single gather over the sample. Trees whose
+            table would have more than max_children_table_size entries (e.g. for large vocabularies) search children by
+            binary search on their keys instead. Args:
+                - X (array): encoded sample.
+                - start (int): first position to be associated. Default is max_depth, so that all positions have full history.
+            Returns array with index of associated leaf for positions start, ..., len(X)-1, or -1 for positions whose history
+            descends to a missing child or is exhausted before reaching a leaf.
+        """
+        X = np.asarray(X)
+        start = self.max_depth if start is None else start
+        get_children, is_terminal = self.__get_children_lookup()
+        sink = self.n_nodes
+
+        contexts = np.zeros(max(len(X)-start, 0), dtype=np.int64)
+        for l in range(1, self.max_depth+1):
+            # Positions with less than l symbols of history cannot descend further
+            lo = min(max(l-start, 0), len(contexts))
+            if lo > 0:
+                contexts[:lo] = np.where(is_terminal[contexts[:lo]], contexts[:lo], sink)
+            contexts[lo:] = get_children(contexts[lo:], X[start+lo-l:len(X)-l])
+
+        contexts[contexts == sink] = -1
+        return contexts
+
+    def __get_children_lookup(self):
+        """
+            Returns function that maps arrays of nodes and symbol codes to the child of each node with each symbol, together
+            with flags of nodes at which descent stops. Leaves are mapped to themselves, and missing children to a sink node
+            (with index n_nodes), which is also mapped to itself. Children are looked up in a dense table, flattened so that
+            child of node with symbol c is at node*|V| + c, or by binary search on keys parent*|V| + symbol of all nodes
+            (which are sorted in level order) if table is too large.
+        """
+        V = len(self.vocabulary)
+        sink = self.n_nodes
+        is_terminal = np.append(self.is_leaf, True)
+
+        if (sink+1)*V <= self.max_children_table_size:
+            dtype = np.int32 if (sink+1)*V < np.iinfo(np.int32).max else np.int64
+            children = np.full((sink+1, V), sink, dtype=dtype)
+            leaves = self.leaves
+            children[leaves] = leaves[:, None]
+            children[self.parent[1:], self.symbol[1:]] = np.arange(1, sink)
+            children = children.reshape(-1)
+            return (lambda nodes, codes: children[nodes*V + codes]), is_terminal
+
+        keys = self.parent[1:]*V + self.symbol[1:]
+
+        def get_children(nodes, codes):
+            node_keys = nodes*V + codes
+            position = np.minimum(np.searchsorted(keys, node_keys), len(keys)-1)
+            found = (keys[position] == node_keys) if len(keys) > 0 else np.zeros(len(nodes), dtype=bool)
+            return np.where(is_terminal[nodes], nodes, np.where(found, position+1, sink))
+
+        return get_children, is_terminal
+
+    def select(
+        self,
+        keep
+    ):
+        """
+            Returns new tree with nodes for which keep is True. The parent of every kept node must also be kept.
+        """
+        keep = np.asarray(keep, dtype=bool).copy()
+        keep[0] = True
+        new_index = np.cumsum(keep)-1
+        parent = self.parent[keep]
+        parent[1:] = new_index[parent[1:]]
+        node = self.transition_node
+        is_kept = keep[node]
+        return ContextTree(
+            parent=parent,
+            symbol=self.symbol[keep],
+            n_ocurrences=self.n_ocurrences[keep],
+            transition_counts=None,
+            vocabulary=self.vocabulary,
+            transitions=(new_index[node[is_kept]], self.transition_symbol[is_kept], self.transition_count[is_kept])
+        )
+
+    def reduce_children(
+        self,
+        values,
+        depth,
+        ufunc=np.add
+    ):
+        """
+            Reduces values of nodes of given depth over children of each node of previous depth, with ufunc (np.add by
+            default). Values are given for all nodes along their last axis, so several rows (e.g. one per parameter value) are
+            reduced at once. Returns array with one entry per node of previous depth along last axis, which is the identity
+            of ufunc for nodes without children.
+        """
+        values = np.asarray(values)
+        level = self.get_level(depth)
+        parent = self.parent[level]
+        first = self.level_offsets[depth-1]
+        reduced = np.full(
+            values.shape[:-1] + (self.level_offsets[depth]-first,),
+            ufunc.identity,
+            dtype=values.dtype
+        )
+        if len(parent) == 0:
+            return reduced
+
+        # Children of each node are contiguous, so they are reduced from position of their first child
+        starts = np.flatnonzero(np.r_[True, parent[1:] != parent[:-1]])
+        reduced[..., parent[starts]-first] = ufunc.reduceat(values[..., level], starts, axis=-1)
+        return reduced
+
+    def get_pruning_mask(
+        self,
+        keep_children
+    ):
+        """
+            Returns mask of nodes that are kept when nodes for which keep_children is False become leaves, with all of their
+            descendants removed. Flags are propagated from the root towards the leaves, one depth at a time. Tree itself is
+            not modified, so several masks can be obtained from it. Flags may have leading axes (e.g. one row per parameter
+            value), in which case a mask is returned for each row.
+        """
+        keep_children = np.asarray(keep_children, dtype=bool)
+        keep = np.ones(keep_children.shape, dtype=bool)
+        for l in range(1, self.max_depth+1):
+            level = self.get_level(l)
+            parent = self.parent[level]
+            keep[..., level] = keep[..., parent] & keep_children[..., parent]
+        return keep
+
+    def prune(
+        self,
+        keep_children
+    ):
+        """
+            Returns new tree with nodes kept by pruning mask obtained from keep_children (see get_pruning_mask).
+        """
+        return self.select(
+            self.get_pruning_mask(keep_children=keep_children)
+        )
@@ -0,0 +1,101 @@
+import numpy as np
+
+import hashlib
+from collections import OrderedDict
+
+
+class CountCache:
+    """
+        Cache of trees of counts, so that fitting the same sample again (e.g. with other methods or parameters) does not
+        count it again. Trees are keyed by fingerprint of encoded sample together with vocabulary, max_order, make_admissible
+        and tree_construction of tree object, which are all settings that counting depends on. Least recently used trees are
+        evicted once total size of cached trees exceeds max_bytes.
+
+        Trees of counts are never modified by solvers (see VLMC.solve), so cached trees are shared by all tree objects that
+        use them. A single cache can be given to several tree objects.
+    """
+
+    def __init__(
+        self,
+        max_bytes=2**30
+    ):
+        """
+            Class constructor method. Args:
+                - max_bytes (int): max total size, in bytes, of arrays of cached trees. Trees larger than this are not cached.
+        """
+        if max_bytes < 0:
+            raise ValueError("Size budget of cache must not be negative.")
+        self.max_bytes = int(max_bytes)
+        self.n_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.__entries = OrderedDict()
+
+    def __len__(self):
+        return len(self.__entries)
+
+    @staticmethod
+    def get_key(
+        X,
+        vocabulary,
+        max_order,
+        make_admissible,
+        tree_construction
+    ):
+        """
+            Returns key of tree of counts of encoded sample X for given settings. Sample is identified by a 128-bit BLAKE2
+            digest of its codes, with its length and type.
+        """
+        X = np.ascontiguousarray(X)
+        digest = hashlib.blake2b(X.view(np.uint8), digest_size=16).hexdigest()
+        return (
+            digest,
+            len(X),
+            X.dtype.str,
+            repr(list(vocabulary)),
+            max_order,
+            bool(make_admissible),
+            tree_construction
+        )
+
+    def get(
+        self,
+        key
+    ):
+        """
+            Returns (count_tree, max_order) cached for key, marking it as most recently used, or None if key is not cached.
+        """
+        entry = self.__entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.__entries.move_to_end(key)
+        return entry[:2]
+
+    def put(
+        self,
+        key,
+        count_tree,
+        max_order
+    ):
+        """
+            Caches tree of counts for key, with max order of tree object after counting, evicting least recently used trees
+            until total size is within budget.
+        """
+        size = count_tree.nbytes
+        if key in self.__entries:
+            self.n_bytes -= self.__entries.pop(key)[2]
+        if size > self.max_bytes:
+            return
+        while self.n_bytes + size > self.max_bytes:
+            self.n_bytes -= self.__entries.popitem(last=False)[1][2]
+        self.__entries[key] = (count_tree, max_order, size)
+        self.n_bytes += size
+
+    def clear(self):
+        """
+            Removes all cached trees.
+        """
+        self.__entries.clear()
+        self.n_bytes = 0
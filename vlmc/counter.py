@@ -1,348 +1,334 @@
 import numpy as np
 
-import multiprocessing
 from functools import partial
-from .utils import count_word_ocurrences, count_subword_ocurrences, count_transitions_ocurrences, obtain_associated_context
+from .utils import count_subword_ocurrences, count_transitions_ocurrences
+from .kgram_counts import KGramCounts
+from .sketch_counts import SketchCounts
+from .suffix_counts import SuffixCounts
+from .context_tree import ContextTree
+from .backend import get_backend
+
+class AssociationError(ValueError):
+    """
+        Error raised when words in sample cannot be associated to any context in admissible tree. Attributes:
+            - positions (array): all positions of sample preceded by a word with no associated context.
+            - words (list): words (tuples of symbols, in chronological order) preceding the first n_reported positions.
+    """
+
+    n_reported = 10
+
+    def __init__(
+        self,
+        positions,
+        words
+    ):
+        self.positions = positions
+        self.words = words
+        super().__init__(
+            '{} words could not be associated to any context in admissible tree. First ones, at positions {}: {}.'.format(
+                len(positions),
+                positions[:self.n_reported].tolist(),
+                words
+            )
+        )
+
 
 class Counter:
     """
         Class that performs counting of symbol ocurrences in a given sample X. Developments are intensive on
-        class methods and attributes, so instantiation of objects is not needed. Counts and transition probabilities
-        associated to symbols are saved in tree object given as input. 
+        class methods and attributes, so instantiation of objects is not needed. Counts associated to contexts are saved
+        in a ContextTree, which is assigned to the "context_tree" and "count_tree" attributes of tree object given as input.
     """
-    
+
     @classmethod
     def fit(
         cls,
         vlmc,
         X,
-        njobs
+        njobs,
+        engine='kgram',
+        backend=None,
+        kgram_counts=None
     ):
         """
-            High-level method for adjusting counter to sample X, according to given vlmc object.
+            High-level method for adjusting counter to sample X, according to given vlmc object. Args:
+                - vlmc (VLMC): tree object to which counts are saved.
+                - X (array): encoded sample, with symbol codes given by position of symbols in vocabulary (see VLMC.encode).
+                - njobs (int): number of parallel jobs used for counting and word association verification. With 'kgram' engine,
+                sample is split in njobs chunks counted in parallel; with 'reference' engine, words are distributed among jobs.
+                - engine (string): counting engine. 'kgram' (default) walks the sample once, filling a table with counts for all
+                contexts up to tree depth. 'reference' counts ocurrences separately for each word, rescanning the sample each time.
+                - backend (Backend or string): execution backend for parallel tasks (see backend.get_backend). If None, tasks
+                run serially in-process when njobs=1 and in a pool of njobs processes otherwise. Backends created here are
+                closed at the end of fit, while given Backend objects are left open to be reused.
+                - kgram_counts (KGramCounts or SketchCounts): counts already accumulated for sample (see VLMC.partial_fit),
+                used by 'kgram' engine instead of counting X. In this case X may be None, and word association is verified from
+                head of sample kept in counts.
         """
+        if engine not in ('kgram', 'reference'):
+            raise ValueError("Counting engine must be either 'kgram' or 'reference'.")
+        if (engine=='reference') and (vlmc.tree_construction=='sparse'):
+            raise ValueError("Sparse tree construction requires 'kgram' counting engine.")
+        if (engine=='reference') and (kgram_counts is not None):
+            raise ValueError("Accumulated counts can only be used with 'kgram' counting engine.")
+        if (vlmc.max_order is None) and ((engine=='reference') or (X is None)):
+            raise ValueError("Trees without max order can only be counted from sample with 'kgram' counting engine.")
+
         # Saves class attributes
-        cls.X=X
+        cls.X=np.asarray(X) if X is not None else None
+        cls.kgram_counts=kgram_counts
         cls.njobs=njobs
         cls.vlmc=vlmc
-        
-        # If admissibility criteria are required, trim tree so that depth is not greater than log(len(X))
+        cls.engine=engine
+        cls.backend, owns_backend = get_backend(
+            backend=backend,
+            njobs=njobs
+        )
+
+        try:
+            cls.__fit()
+
+            # Tree of counts is kept by tree object, so that solvers can prune it without modifying it
+            cls.vlmc.count_tree = cls.vlmc.context_tree
+        finally:
+            if owns_backend:
+                cls.backend.close()
+
+    @classmethod
+    def __fit(cls):
+        """
+            Performs counting and, if required, applies admissibility criteria to tree.
+        """
+
+        # Without max order, all context depths are obtained from suffix array of reversed sample, and depth of tree is
+        # given by data
+        if cls.vlmc.max_order is None:
+            cls.__kgram_counts = SuffixCounts(
+                vocabulary_size=len(cls.vlmc.vocabulary)
+            ).fit(X=cls.X)
+            cls.vlmc.context_tree = ContextTree.from_kgram_counts(
+                kgram_counts=cls.__kgram_counts,
+                vocabulary=cls.vlmc.vocabulary
+            )
+            cls.__counted_depth = 0
+            if cls.vlmc.make_admissible:
+                cls.__make_admissible()
+            cls.__get_transition_counts()
+            return
+
+        # If admissibility criteria are required, tree depth is not greater than log(len(X))
+        n = len(cls.X) if cls.X is not None else cls.kgram_counts.n
         truncate_depth=int(
             np.floor(
-                np.log(len(X))
+                np.log(n)
             )
         )
+        depth = cls.vlmc.max_order
         if cls.vlmc.make_admissible:
-            if cls.vlmc.max_order > truncate_depth:
-                cls.__truncate_tree(
-                    parent=cls.vlmc.tree,
-                    k=truncate_depth
+            depth = min(depth, truncate_depth)
+
+        # Counts symbols in given sample, building tree
+        if cls.engine=='kgram':
+            # Walk sample once, counting all contexts up to tree depth, and build tree from counts. With more than one
+            # job, sample is split in overlapping chunks counted in parallel. Accumulated counts are truncated to tree depth
+            if cls.kgram_counts is None:
+                cls.__kgram_counts = KGramCounts(
+                    max_order=depth,
+                    vocabulary_size=len(cls.vlmc.vocabulary)
+                ).fit(
+                    X=cls.X,
+                    backend=cls.backend if cls.backend.njobs > 1 else None
                 )
-                
-        # Counts symbols in given sample
-        cls.__get_word_counts()
-        
-        # If admissibility criteria are required, trim non-appearing contexts
-        if cls.vlmc.make_admissible:
-            # Guarantee that all contexts have non-zero count
-            cls.__trim_non_appearing_contexts(
-                parent=cls.vlmc.tree
+            elif cls.kgram_counts.max_order > depth:
+                cls.__kgram_counts = cls.kgram_counts.truncate(max_order=depth)
+            else:
+                cls.__kgram_counts = cls.kgram_counts
+            cls.__counted_depth = cls.__kgram_counts.max_order
+
+            # Approximate counts are only kept for contexts that can be told apart from collisions, so tree built from them
+            # is always sparse, as filling all |V|^l contexts of each level would undo the bound on its size
+            cls.vlmc.context_tree = ContextTree.from_kgram_counts(
+                kgram_counts=cls.__kgram_counts,
+                vocabulary=cls.vlmc.vocabulary,
+                full=(cls.vlmc.tree_construction=='full') and not isinstance(cls.__kgram_counts, SketchCounts)
             )
-            
-            # Guarantee that all words in sample can be associated to context
-            cls.__verify_word_association()
-        
-        # Obtains transition probabilities from word counts
-        cls.__get_transition_probabilities()
-        
-        
-            
-        
-    @classmethod
-    def __truncate_tree(
-        cls,
-        parent,
-        k
-    ):
-        """
-            This method truncates tree to depth k. Movements across tree are done by recursion.
-        """
-        
-        #If node has length of word smaller than k, move towards leaves
-        if (len(parent.word) < k) or (parent.word == 'root'):
-            for w in parent.children.values():
-                cls.__truncate_tree(
-                    parent=w,
-                    k=k
-                )
-        # If node has length of word k, trim all its descendants.
         else:
-            parent.children=None
-            parent.is_leaf=True
-            return
+            cls.vlmc.context_tree = ContextTree.full(
+                max_order=depth,
+                vocabulary=cls.vlmc.vocabulary
+            )
+            cls.__get_word_counts()
+            cls.__counted_depth = depth
+
+        # If admissibility criteria are required, trim non-appearing contexts and redundancies, and guarantee that all words
+        # in sample can be associated to context
+        if cls.vlmc.make_admissible:
+            cls.__make_admissible()
+
+        # Obtains transition counts for remaining nodes
+        cls.__get_transition_counts()
 
-        return
-    
     @classmethod
-    def __trim_non_appearing_contexts(
-        cls,
-        parent
-    ):
+    def __make_admissible(cls):
         """
-            This method trims tree by removing contexts for which there are no ocurrences in sample X. 
-            Movements across tree are done by recursion.
+            Applies admissibility criteria to tree in a single pass over its levels: contexts that don't appear in sample are
+            removed with all their descendants, and children of contexts with a single appearing child are removed, so that
+            tree is irreducible. Association of words in sample to contexts is then verified from the same counts.
         """
-        def __remove_non_appearing_contexts(
-            parent
-        ):
-            """
-                This method removes words that don't appear in sample, as well as all descendants.
-            """
-            # Move towards leaves
-            if parent.children is not None:
-                for w in parent.children.values():
-                    # If child has appearances, go further down tree
-                    if w.n_ocurrences > 0:
-                        __remove_non_appearing_contexts(
-                            parent=w,
-                        )
-                    # If child has no appearances, trim child
-                    else:
-                        parent.children = {
-                            a: c for a, c in parent.children.items() if c.word != w.word
-                        }
-            # If at leaves
-            else:
-                return
 
+        tree = cls.vlmc.context_tree
+
+        # A node is kept if it appears, its parent is kept and its parent has more than one appearing child. Levels are
+        # visited from the root, so parents are always decided before their children
+        appears = tree.n_ocurrences > 0
+        n_appearing_children = np.bincount(tree.parent[1:], weights=appears[1:], minlength=tree.n_nodes)
+        keep = appears.copy()
+        keep[0] = True
+        for l in range(1, tree.max_depth+1):
+            level = tree.get_level(l)
+            parent = tree.parent[level]
+            keep[level] &= keep[parent] & (n_appearing_children[parent] != 1)
+
+        tree = tree.select(keep)
+        cls.vlmc.context_tree = tree
+
+        # Get tree max depth and update class object, unless tree has no max order
+        max_depth = tree.max_depth
+        if cls.vlmc.max_order is not None:
+            cls.vlmc.max_order=max_depth
+
+        # Approximate counts do not keep sample, so association cannot be verified without it
+        if (cls.X is None) and isinstance(cls.__kgram_counts, SketchCounts):
             return
-        
-        
-        def __make_tree_irreducible(
-            parent
-        ):
-            """
-                This trims redundancies as to make tree irreducible.
-            """
-        
-            # If at internal node, recursively call method for node's children
-            if parent.children is not None:
-                for w in parent.children.values():
-                    w = __make_tree_irreducible(parent=w)
-            # If at leaves, return parent
-            else:
-                return parent
-
-            # Trims children if parent has only one child
-            if len(parent.children.values())==1:
-                parent.children=None
-                parent.is_leaf=True
-
-            return parent
-
-        # Trim contexts that don't appear
-        __remove_non_appearing_contexts(parent=parent)
-        
-        # Remove redundancies as tom make tree irreducible
-        __make_tree_irreducible(parent=parent)
-        
-        
-    @classmethod
-    def __verify_word_association(cls):
-        
-        # Obtains tree leaves
-        leaves = [
-            l.word for l in cls.vlmc.get_leaves()
-        ]
-        
-        # Get tree max depth and update class object
-        max_depth = max([
-            len(l) for l in leaves
-        ])
-        cls.vlmc.max_order=max_depth
-        
-        # Iteratively window sample using length max_depth 
-        windows = [
-            ''.join(
-                [str(x) for x in cls.X[i-max_depth: i]]
-            ) for i in range(max_depth, len(cls.X))
-        ]
-        
-        # Function that will be executed
-        verify_fn = partial(
-            obtain_associated_context,
-            leaves
+
+        # Ocurrences are counted for positions with history of counted depth, which contribute to every context along their
+        # history. Such positions always descend to a leaf of trimmed tree, so only positions from max_depth up to counted
+        # depth (at head of sample) need to be mapped to contexts
+        head = cls.X[:cls.__counted_depth] if cls.X is not None else cls.__kgram_counts.head
+        contexts = tree.associate(
+            X=head,
+            start=max_depth
         )
-        
-        # Distributedly execute verification, obtaining associated context to windowed words
-        with multiprocessing.Pool(cls.njobs) as p:
-            associations=p.map(verify_fn, windows)
-        
-        # Check for words that have no context associated
-        no_ctxt = [
-            list(d.keys())[0] for d in associations if len(list(d.values())[0])==0
-        ]
-        if len(no_ctxt) > 0:
-            import pdb;pdb.set_trace()
-            raise ValueError('Word {} could not be associated to any context in admissible tree.'.format(no_ctxt[0]))
-            
-        # Check for words that have more than one context associated
-        several_ctxts = [
-            list(d.keys())[0] for d in associations if len(list(d.values())[0])>1
-        ]
+
+        # Check for words that have no context associated. As contexts of a tree are never suffixes of one another, each
+        # word is associated to at most one context
+        no_ctxt = np.flatnonzero(contexts < 0) + max_depth
         if len(no_ctxt) > 0:
-            raise ValueError('Word {} is associated to more than one context in admissible tree.'.format(several_ctxts[0]))
-        
-        
-        
+            raise AssociationError(
+                positions=no_ctxt,
+                words=[
+                    tuple(cls.vlmc.vocabulary[c] for c in head[i-max_depth:i]) for i in no_ctxt[:AssociationError.n_reported]
+                ]
+            )
+
     @classmethod
     def __get_word_counts(cls):
         """
-            Obtains counts for all words in tree. Counting is performed on tree leaves and 
+            Obtains counts for all words in tree with reference engine. Counting is performed on tree leaves and
             aggregated by summation for subsequent parent nodes.
         """
-        
+
+        tree = cls.vlmc.context_tree
+
         # Get counts for leaves
-        cls.__get_leaves_counts()
-        
-        # Aggregate counts starting from leaves and moving towards the root
-        cls.vlmc.tree = cls.__update_tree_counts(parent=cls.vlmc.tree)
-     
-    
+        leaves = tree.leaves
+        tree.n_ocurrences[leaves] = cls.__get_leaves_counts(
+            leaves=tree.get_all_codes(leaves)
+        )
+
+        # Aggregate counts starting from leaves and moving towards the root, one depth at a time
+        for l in range(tree.max_depth, 0, -1):
+            level = tree.get_level(l)
+            np.add.at(tree.n_ocurrences, tree.parent[level], tree.n_ocurrences[level])
+
     @classmethod
-    def __get_leaves_counts(cls):
+    def __get_leaves_counts(
+        cls,
+        leaves
+    ):
         """
-            Obtains counts for leaves in tree. Counting is performed distributedly.
+            Obtains counts for leaves in tree with reference engine. Counting is performed distributedly.
         """
-        
-        # Obtains tree leaves
-        leaves = [
-            l.word for l in cls.vlmc.get_leaves()
-        ]
-        
+
         # Defines function for executing leaves symbols counts
-        # by fixating inputs and vocabulary
+        # by fixating vocabulary. Sample is given to function by backend
         count_fn = partial(
-            count_subword_ocurrences, 
-            ''.join([str(x) for x in cls.X]),
-            [str(s) for s in cls.vlmc.vocabulary]
+            _count_subword_ocurrences,
+            [(c,) for c in range(len(cls.vlmc.vocabulary))]
         )
-        
+
         # Distributedly perform leaf symbol counting
-        with multiprocessing.Pool(cls.njobs) as p:
-            counts=p.map(count_fn, leaves)
-
-        # Saves leaf counts as class attribute
-        cls.__leaves_counts = {
-            l: c for l, c in zip(leaves, counts)
-        }
-    
-    @classmethod
-    def __update_tree_counts(
-        cls,
-        parent
-    ):
-        """
-            Given that word counts for leaves are already performed, this method aggregates child ocurrences to obtain counts for
-            internal nodes. Summing is performed from the leaves towards the root, and all movement across the tree is performed recursively.
-        """
-        
-        # If at internal node, recursively call method for node's children
-        if parent.children is not None:
-            parent_counts = 0
-            for w in parent.children.values():
-                w = cls.__update_tree_counts(parent=w)
-                parent_counts += w.n_ocurrences
-        # If at leaves, obtain number of ocurrences from count previously performed
-        else:
-            parent.n_ocurrences = cls.__leaves_counts[parent.word]
-            return parent
-        
-        # After summing child ocurrences, save total count as number of parent ocurrences
-        parent.n_ocurrences=parent_counts
-        
-        return parent
-    
-        
+        with cls.backend.share(cls.X) as sample:
+            counts=cls.backend.map(count_fn, leaves, sample)
+
+        return counts
+
     @classmethod
-    def __get_transition_probabilities(cls):
+    def __get_transition_counts(cls):
         """
-            After count for leaves and internal nodes has been obtained, this method calculates transition counts and probabilities
-            for all symbols in tree. A dictionary (transitions_dict) is calculated with transition counts, in which keys are symbols and
-            values are also dictionaries (with keys being symbols in vocabulary and values transition counts). The latter dictionary
-            is then used to update transition counts and calculate transition probabilities for all nodes in tree.
+            After count for leaves and internal nodes has been obtained, this method obtains transition counts for all nodes
+            in tree. Transition counts of the root are given by number of ocurrences of its children; if root is the only
+            node in tree, its transitions are counted as for any other node.
         """
-        
-        def __get_node_probabilities(parent):
-            """
-                This method uses calculated transitions_dict to update transitions counts for objects in tree. Also, from counts, transition
-                probabilities are estimated from counts. Movement in tree is performed recursively.
-            """
-            
-            # If not at leaves, recursively call method to move down tree
-            if parent.children is not None:
-                for w in parent.children.values():
-                    __get_node_probabilities(parent=w)
-            
-            # If at leaves
-            else:
-                # Save transition counts to object
-                parent.transition_counts = cls.__transitions_dict[parent.word]
-                
-                # Save estimated transition probabilities to object
-                parent.transition_probabilities = {
-                    s: c/parent.n_ocurrences for s, c in parent.transition_counts.items()
-                }
-                
-                return
-            
-            # If returning from leaves to root
-            
-            # Save transition counts to object
-            parent.transition_counts = cls.__transitions_dict[parent.word]
-            
-            # Save estimated transition probabilities to object
-            parent.transition_probabilities = {
-                s: c/parent.n_ocurrences for s, c in parent.transition_counts.items()
-            }
-            
-            return
-        
-        
-        # Obtain transition counts for root node
-        transitions_dict = {
-            'root':{
-                c.word: c.n_ocurrences for c in cls.vlmc.tree.children.values()
-            }
-        }
-        
-        # Obtain words for all nodes in tree (except the root)
-        words = [
-            node.word for node in cls.vlmc.get_all_nodes() if node.word !='root'
-        ]
-        
-        # Wrapper function for counting transitions, obtained by fixating sample and vocabulary
-        count_transitions_fn = partial(
-            count_transitions_ocurrences, 
-            ''.join([str(x) for x in cls.X]),
-            [str(s) for s in cls.vlmc.vocabulary]
-        )
-        
-        # distributedly execute transition count for all nodes except rood
-        with multiprocessing.Pool(cls.njobs) as p:
-            transitions=p.map(count_transitions_fn, words)
-        
-        # Update transition counts in transitions dict
-        for t in transitions:
-            transitions_dict.update(t)
-        
-        # Save transitions dict as class argument
-        cls.__transitions_dict = transitions_dict
-        
-        # Execute function to update nodes in tree object with transition counts and probabilities
-        __get_node_probabilities(cls.vlmc.tree)
-            
-            
-                    
-                
-        
\ No newline at end of file
+
+        tree = cls.vlmc.context_tree
+
+        # Transition counts with reference engine are obtained for all nodes except the root
+        if cls.engine=='reference':
+            nodes = np.arange(1 if tree.n_nodes > 1 else 0, tree.n_nodes)
+
+            # Wrapper function for counting transitions, obtained by fixating vocabulary. Sample is given to
+            # function by backend
+            count_transitions_fn = partial(
+                _count_transitions_ocurrences,
+                [(c,) for c in range(len(cls.vlmc.vocabulary))]
+            )
+
+            # distributedly execute transition count for all nodes except rood
+            with cls.backend.share(cls.X) as sample:
+                transitions=cls.backend.map(count_transitions_fn, tree.get_all_codes(nodes), sample)
+            tree.set_transition_counts(
+                nodes=nodes,
+                counts=[list(list(t.values())[0].values()) for t in transitions]
+            )
+
+        # Obtain transition counts for root node from its children, which have one symbol each
+        if tree.n_nodes > 1:
+            children = tree.get_level(1)
+            root_counts = np.zeros(len(cls.vlmc.vocabulary), dtype=np.int64)
+            root_counts[tree.symbol[children]] = tree.n_ocurrences[children]
+            tree.set_transition_counts(
+                nodes=0,
+                counts=root_counts
+            )
+
+
+def _count_subword_ocurrences(
+    vocabulary,
+    X,
+    word
+):
+    """
+        Task for counting ocurrences of word followed by any symbol in vocabulary, in sample X.
+    """
+    return count_subword_ocurrences(
+        X=X,
+        vocabulary=vocabulary,
+        word=word
+    )
+
+
+def _count_transitions_ocurrences(
+    vocabulary,
+    X,
+    word
+):
+    """
+        Task for counting transitions from word to each symbol in vocabulary, in sample X.
+    """
+    return count_transitions_ocurrences(
+        X=X,
+        vocabulary=vocabulary,
+        word=word
+    )
+
@@ -0,0 +1,561 @@
+import numpy as np
+
+from functools import partial
+from numpy.lib.stride_tricks import sliding_window_view
+from .utils import get_code_dtype
+
+
+# Multiplier of rolling polynomial hash of windows
+_HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+
+class KGramCounts:
+    """
+        Table of context and transition counts for all depths up to max_order, obtained by walking encoded sample X a single time.
+        Each window of length max_order+1 is counted once; counts for shallower contexts are then obtained by aggregating
+        distinct windows over their suffixes, together with the first max_order positions of the sample (which have shorter
+        histories available).
+
+        Counts are organized in levels, one per depth. Each context in a level is identified by its index, and is keyed by
+        (index of parent context)*vocabulary_size + (code of its oldest symbol), in which the parent context is obtained by
+        removing the oldest symbol. Levels are sorted by key, which is the order of nodes in a ContextTree.
+
+        Distinct windows counted by partial_fit are kept in runs (tables of distinct windows with their counts) of
+        geometrically decreasing size. A new chunk only merges runs that are not much larger than it, so each window is
+        merged O(log n) times, and cost of a call does not grow with counts accumulated so far. Runs are reduced into a
+        single table when windows are accessed (see windows and window_counts).
+
+        Transitions of each level are kept in a dense (contexts x |V|) matrix, unless it would have more than max_dense_size
+        entries (e.g. for large vocabularies), in which case only transitions that happen are kept (see get_level_transitions).
+        Counts are always accumulated as integers.
+    """
+
+    # Max number of entries of dense matrix of transition counts of a level
+    max_dense_size = 2**24
+
+    def __init__(
+        self,
+        max_order,
+        vocabulary_size
+    ):
+        """
+            Class constructor method. Args:
+                - max_order (int): max depth of contexts to be counted.
+                - vocabulary_size (int): number of symbols in vocabulary. Sample is expected to be encoded with codes in
+                range(vocabulary_size).
+        """
+        self.max_order = int(max_order)
+        self.vocabulary_size = int(vocabulary_size)
+        self.reset()
+
+    def reset(self):
+        """
+            Discards all counts.
+        """
+        dtype = get_code_dtype(self.vocabulary_size)
+        self.n = 0
+        self.__runs = []
+        self.head = np.zeros(0, dtype=dtype)
+        self.tail = np.zeros(0, dtype=dtype)
+        self.__levels = None
+        return self
+
+    @property
+    def windows(self):
+        """
+            (windows x max_order+1) array of distinct windows counted, in which runs are reduced on access.
+        """
+        return self.__reduce_runs()[0]
+
+    @property
+    def window_counts(self):
+        """
+            Number of ocurrences of each of distinct windows.
+        """
+        return self.__reduce_runs()[1]
+
+    def set_windows(
+        self,
+        windows,
+        window_counts
+    ):
+        """
+            Replaces counted windows by given distinct windows and their counts.
+        """
+        self.__runs = [(windows, np.asarray(window_counts, dtype=np.int64))] if len(windows) > 0 else []
+        self.__levels = None
+        return self
+
+    def __reduce_runs(self):
+        """
+            Reduces all runs into a single table of distinct windows, which is returned with its counts.
+        """
+        if len(self.__runs) != 1:
+            self.__runs = [merge_windows(
+                windows=[w for w, _ in self.__runs],
+                window_counts=[c for _, c in self.__runs],
+                max_order=self.max_order,
+                dtype=get_code_dtype(self.vocabulary_size)
+            )]
+        return self.__runs[0]
+
+    @property
+    def levels(self):
+        """
+            Counts organized in levels, one per depth. Levels are built from distinct windows when first accessed after counts
+            change.
+        """
+        if self.__levels is None:
+            self.__levels = self.__get_levels()
+        return self.__levels
+
+    def fit(
+        self,
+        X,
+        backend=None
+    ):
+        """
+            Counts all contexts of length up to max_order and their transitions in encoded sample X, in a single pass. Args:
+                - X (array): encoded sample.
+                - backend (Backend): execution backend (see backend.get_backend). If given, sample is split in backend.njobs
+                contiguous chunks that overlap by max_order symbols, windows of each chunk are counted by a separate worker
+                and per-chunk counts are then summed. If None, sample is counted as a single chunk in calling process.
+        """
+        return self.reset().partial_fit(
+            X=X,
+            backend=backend
+        )
+
+    def partial_fit(
+        self,
+        X,
+        backend=None
+    ):
+        """
+            Adds counts of encoded chunk X, which continues sample counted so far. The last max_order symbols seen are
+            carried in tail, so that windows across chunk boundaries are counted exactly once. Windows of chunk are added as
+            a new run, which is merged with the last runs while they are less than twice its size, so that amortized cost of
+            each call only depends on size of chunk. Args are the same as for fit.
+        """
+
+        k = self.max_order
+        X = np.concatenate([self.tail, np.asarray(X).astype(self.tail.dtype)])
+
+        windows, window_counts = self.__count_windows(
+            X=X,
+            backend=backend
+        )
+        runs = [r for r in self.__runs if len(r[0]) > 0] + ([(windows, window_counts)] if len(windows) > 0 else [])
+        while (len(runs) > 1) and (len(runs[-2][0]) < 2*len(runs[-1][0])):
+            runs[-2:] = [merge_windows(
+                windows=[runs[-2][0], runs[-1][0]],
+                window_counts=[runs[-2][1], runs[-1][1]],
+                max_order=k,
+                dtype=X.dtype
+            )]
+        self.__runs = runs
+
+        # Sample positions preceding the first window are kept in head. While less than max_order symbols have been seen,
+        # tail holds all of them, so head is obtained from it
+        self.n += len(X)-len(self.tail)
+        if len(self.head) < k:
+            self.head = X[:k].copy()
+        self.tail = X[max(len(X)-k, 0):].copy()
+        self.__levels = None
+
+        return self
+
+    def truncate(
+        self,
+        max_order
+    ):
+        """
+            Returns new counts for contexts of length up to max_order (which must not be greater than current max_order), as
+            if they were obtained by fitting the same sample. Windows are shortened to their last max_order+1 symbols, and
+            head positions from max_order onwards become windows.
+        """
+
+        k = self.max_order
+        d = int(max_order)
+        if d > k:
+            raise ValueError('Counts can only be truncated to an order not greater than {}.'.format(k))
+
+        counts = KGramCounts(
+            max_order=d,
+            vocabulary_size=self.vocabulary_size
+        )
+        head_windows = sliding_window_view(self.head, d+1) if len(self.head) > d else self.head[:0].reshape(0, d+1)
+        counts.set_windows(*unique_windows(
+            windows=np.concatenate([self.windows[:, k-d:], head_windows]),
+            counts=np.concatenate([self.window_counts, np.ones(len(head_windows), dtype=np.int64)])
+        ))
+        counts.n = self.n
+        counts.head = self.head[:d].copy()
+        counts.tail = self.tail[max(len(self.tail)-d, 0):].copy()
+
+        return counts
+
+    def merge(
+        self,
+        other
+    ):
+        """
+            Returns new counts for the concatenation of sample counted here and sample counted by other, which continues it.
+            Windows that span the boundary between both samples are recovered from tail of this sample and head of the other.
+            Merging is associative, so counts of contiguous shards can be merged in any grouping, as long as their order is kept.
+        """
+
+        if (other.max_order != self.max_order) or (other.vocabulary_size != self.vocabulary_size):
+            raise ValueError('Only counts with same max order and vocabulary size can be merged.')
+
+        k = self.max_order
+        counts = KGramCounts(
+            max_order=k,
+            vocabulary_size=self.vocabulary_size
+        )
+
+        # Positions at head of other sample have full history once preceded by tail of this sample
+        boundary = np.concatenate([self.tail, other.head])
+        boundary_counts = [_count_windows(k, boundary, (0, len(boundary)-k))] if len(boundary) > k else []
+        counts.set_windows(*merge_windows(
+            windows=[self.windows, other.windows] + [w for w, _ in boundary_counts],
+            window_counts=[self.window_counts, other.window_counts] + [c for _, c in boundary_counts],
+            max_order=k,
+            dtype=self.windows.dtype
+        ))
+
+        counts.n = self.n + other.n
+        counts.head = np.concatenate([self.head, other.head])[:k]
+        tail = np.concatenate([self.tail, other.tail])
+        counts.tail = tail[max(len(tail)-k, 0):].copy()
+
+        return counts
+
+    def save(
+        self,
+        path
+    ):
+        """
+            Saves snapshot of counts to file in path, in numpy .npz format.
+        """
+        np.savez_compressed(
+            path,
+            max_order=self.max_order,
+            vocabulary_size=self.vocabulary_size,
+            n=self.n,
+            windows=self.windows,
+            window_counts=self.window_counts,
+            head=self.head,
+            tail=self.tail
+        )
+
+    @classmethod
+    def load(
+        cls,
+        path
+    ):
+        """
+            Loads snapshot of counts saved by save.
+        """
+        with np.load(path) as snapshot:
+            counts = cls(
+                max_order=int(snapshot['max_order']),
+                vocabulary_size=int(snapshot['vocabulary_size'])
+            )
+            counts.n = int(snapshot['n'])
+            counts.set_windows(
+                windows=snapshot['windows'],
+                window_counts=snapshot['window_counts']
+            )
+            counts.head = snapshot['head']
+            counts.tail = snapshot['tail']
+        return counts
+
+    def __count_windows(
+        self,
+        X,
+        backend
+    ):
+        """
+            Counts distinct windows of length max_order+1 in X, either as a single chunk or split in overlapping chunks
+            among workers of backend.
+        """
+
+        k = self.max_order
+
+        # Each chunk is given by the range of starting positions of its windows, and also holds the max_order symbols
+        # that follow its last starting position, so that windows across chunk boundaries are counted exactly once
+        n_chunks = 1 if backend is None else backend.njobs
+        bounds = [
+            (int(r[0]), int(r[-1])+1) for r in np.array_split(np.arange(max(len(X)-k, 0)), n_chunks) if len(r) > 0
+        ]
+
+        # Count every window of length max_order+1 (context followed by next symbol) in a single pass over each chunk
+        count_fn = partial(
+            _count_windows,
+            k
+        )
+        if (backend is None) or (len(bounds) <= 1):
+            chunk_counts = [count_fn(X, b) for b in bounds]
+        else:
+            with backend.share(X) as sample:
+                chunk_counts = backend.map(count_fn, bounds, sample)
+
+        return merge_windows(
+            windows=[w for w, _ in chunk_counts],
+            window_counts=[c for _, c in chunk_counts],
+            max_order=k,
+            dtype=X.dtype
+        )
+
+    def __get_levels(self):
+        """
+            Aggregates distinct windows over their suffixes, depth by depth, to obtain counts for all contexts. Positions in head
+            of sample only contribute to contexts no longer than the history available to them. Number of ocurrences of a
+            context only considers windows, so that it is the sum of ocurrences of its extensions up to depth max_order.
+        """
+
+        k = self.max_order
+        V = self.vocabulary_size
+        windows = self.windows
+        window_counts = self.window_counts
+        m = len(windows)
+
+        # Positions in head of sample, which only have shorter contexts available
+        head_positions = np.arange(len(self.head))
+        head_next = self.head[head_positions].astype(np.int64)
+        head_counts = np.ones(len(head_positions), dtype=np.int64)
+        window_next = windows[:, k].astype(np.int64)
+
+        # Root level
+        levels = [self.__get_level(
+            parent=np.array([-1]),
+            symbol=np.array([-1]),
+            n_ocurrences=np.array([np.sum(window_counts)], dtype=np.int64),
+            transition_keys=np.concatenate([window_next, head_next]),
+            transition_counts=np.concatenate([window_counts, head_counts])
+        )]
+
+        window_ids = np.zeros(m, dtype=np.int64)
+        head_ids = np.zeros(len(head_positions), dtype=np.int64)
+        for l in range(1, k+1):
+            # Key of context is given by id of parent context (one symbol shorter) and its oldest symbol
+            is_head = head_positions >= l
+            keys, inverse = np.unique(
+                np.concatenate([
+                    window_ids*V + windows[:, k-l],
+                    head_ids[is_head]*V + self.head[head_positions[is_head]-l]
+                ]),
+                return_inverse=True
+            )
+            inverse = inverse.reshape(-1)
+            window_ids = inverse[:m]
+            head_ids[is_head] = inverse[m:]
+
+            # Transitions are keyed by id of context and next symbol, and aggregated for windows and head positions
+            level_n_ocurrences = np.zeros(len(keys), dtype=np.int64)
+            np.add.at(level_n_ocurrences, window_ids, window_counts)
+            levels.append(self.__get_level(
+                parent=keys // V,
+                symbol=keys % V,
+                n_ocurrences=level_n_ocurrences,
+                transition_keys=np.concatenate([window_ids*V + window_next, inverse[m:]*V + head_next[is_head]]),
+                transition_counts=np.concatenate([window_counts, head_counts[is_head]])
+            ))
+
+        return levels
+
+    def __get_level(
+        self,
+        parent,
+        symbol,
+        n_ocurrences,
+        transition_keys,
+        transition_counts
+    ):
+        """
+            Builds level from its contexts and counts of transitions keyed by (index of context)*vocabulary_size + (code of
+            next symbol), which are summed by key. Transitions are kept in a dense (contexts x |V|) matrix, under
+            'transition_counts', if it has at most max_dense_size entries; otherwise, only transitions that happen are kept,
+            under 'transitions', as arrays (context, symbol, count) sorted by context and symbol (see get_level_transitions).
+        """
+        V = self.vocabulary_size
+        level = {
+            'parent': parent,
+            'symbol': symbol,
+            'n_ocurrences': n_ocurrences
+        }
+        if len(parent)*V <= self.max_dense_size:
+            dense = np.zeros(len(parent)*V, dtype=np.int64)
+            np.add.at(dense, transition_keys, transition_counts)
+            level['transition_counts'] = dense.reshape(len(parent), V)
+        else:
+            keys, counts = sum_by_key(transition_keys, transition_counts)
+            level['transitions'] = (keys // V, keys % V, counts)
+        return level
+
+    def get_transition_counts(
+        self,
+        word
+    ):
+        """
+            Returns array with number of transitions from word (tuple of codes, in chronological order) to each symbol in
+            vocabulary. Root is given by an empty tuple.
+        """
+        V = self.vocabulary_size
+        index = 0
+        for l, c in enumerate(reversed(word), start=1):
+            if l > self.max_order:
+                return np.zeros(V, dtype=np.int64)
+            keys = self.levels[l]['parent']*V + self.levels[l]['symbol']
+            key = index*V + c
+            index = np.searchsorted(keys, key)
+            if (index == len(keys)) or (keys[index] != key):
+                return np.zeros(V, dtype=np.int64)
+        level = self.levels[len(word)]
+        if 'transition_counts' in level:
+            return level['transition_counts'][index].copy()
+        rows, symbols, counts = level['transitions']
+        transition_counts = np.zeros(V, dtype=np.int64)
+        lo, hi = np.searchsorted(rows, [index, index+1])
+        transition_counts[symbols[lo:hi]] = counts[lo:hi]
+        return transition_counts
+
+    def get_word_count(
+        self,
+        word
+    ):
+        """
+            Returns number of ocurrences of word followed by any symbol in vocabulary.
+        """
+        return np.sum(self.get_transition_counts(word))
+
+
+def merge_counts(
+    counts
+):
+    """
+        Merges list of counts of contiguous shards of a sample, given in order of shards, into counts for the whole sample.
+    """
+    if len(counts) == 0:
+        raise ValueError('At least one count must be given for merging.')
+    merged = counts[0]
+    for c in counts[1:]:
+        merged = merged.merge(c)
+    return merged
+
+
+def get_level_transitions(
+    level
+):
+    """
+        Returns transitions of contexts of level that happen, as arrays (context, symbol, count) sorted by index of context in
+        level and symbol, whether level keeps them in a dense matrix or sparsely.
+    """
+    if 'transitions' in level:
+        return level['transitions']
+    rows, symbols = np.nonzero(level['transition_counts'])
+    return rows, symbols, level['transition_counts'][rows, symbols]
+
+
+def sum_by_key(
+    keys,
+    counts
+):
+    """
+        Returns distinct keys, sorted, with integer sums of their counts.
+    """
+    if len(keys) == 0:
+        return keys, np.zeros(0, dtype=np.int64)
+    order = np.argsort(keys)
+    sorted_keys = keys[order]
+    first = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+    return sorted_keys[first], np.add.reduceat(counts[order].astype(np.int64), first)
+
+
+def merge_windows(
+    windows,
+    window_counts,
+    max_order,
+    dtype
+):
+    """
+        Reduces lists of distinct windows of length max_order+1 and their counts, obtained separately (e.g. for chunks of a
+        sample), into a single array of distinct windows with summed counts.
+    """
+    window_counts = [c for w, c in zip(windows, window_counts) if len(w) > 0]
+    windows = [w for w in windows if len(w) > 0]
+    if len(windows) == 0:
+        return np.zeros((0, max_order+1), dtype=dtype), np.zeros(0, dtype=np.int64)
+    if len(windows) == 1:
+        return windows[0], np.asarray(window_counts[0], dtype=np.int64)
+
+    return unique_windows(
+        windows=np.concatenate(windows),
+        counts=np.concatenate(window_counts)
+    )
+
+
+def unique_windows(
+    windows,
+    counts=None
+):
+    """
+        Returns distinct rows of (windows x length) array of codes, with their total counts (each row counts once if counts
+        is None). Rows are keyed by a single integer, so that they are reduced with a one-dimensional np.unique: codes of a row
+        are packed as digits when all possible rows fit in 63 bits, and hashed by a rolling polynomial otherwise. Hash
+        collisions are detected by comparing every row to the representative of its key, in which case rows are reduced
+        with a row-wise np.unique instead.
+    """
+    windows = np.asarray(windows)
+    if len(windows) == 0:
+        return windows, np.zeros(0, dtype=np.int64)
+
+    base = int(windows.max())+1
+    keys = np.zeros(len(windows), dtype=np.uint64)
+    packed = float(base)**windows.shape[1] < 2.0**63
+    with np.errstate(over='ignore'):
+        for j in range(windows.shape[1]):
+            if packed:
+                keys = keys*np.uint64(base) + windows[:, j].astype(np.uint64)
+            else:
+                keys = keys*_HASH_MULTIPLIER + windows[:, j].astype(np.uint64) + np.uint64(1)
+
+    # Rows are grouped by sorting keys; first row of each group represents it
+    order = np.argsort(keys)
+    sorted_keys = keys[order]
+    is_first = np.concatenate([[True], sorted_keys[1:] != sorted_keys[:-1]])
+    group = np.cumsum(is_first)-1
+    sorted_windows = windows[order]
+    if not packed and np.any(sorted_windows != sorted_windows[np.flatnonzero(is_first)[group]]):
+        _, first, inverse = np.unique(
+            windows,
+            axis=0,
+            return_index=True,
+            return_inverse=True
+        )
+        return windows[first], np.bincount(
+            inverse.reshape(-1),
+            weights=counts,
+            minlength=len(first)
+        ).astype(np.int64)
+
+    return sorted_windows[is_first], np.bincount(
+        group,
+        weights=counts[order] if counts is not None else None,
+        minlength=int(group[-1])+1
+    ).astype(np.int64)
+
+
+def _count_windows(
+    max_order,
+    X,
+    bounds
+):
+    """
+        Task for counting distinct windows of length max_order+1 of sample X starting at positions in range given by bounds
+        (start, stop).
+    """
+    return unique_windows(
+        windows=sliding_window_view(X[bounds[0]:bounds[1]+max_order], max_order+1)
+    )
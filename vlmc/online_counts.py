@@ -0,0 +1,142 @@
+import numpy as np
+
+from collections import deque
+from numpy.lib.stride_tricks import sliding_window_view
+from .kgram_counts import KGramCounts
+from .utils import get_code_dtype
+
+
+class OnlineCounts:
+    """
+        Counts of windows of length max_order+1 (context followed by next symbol) for drifting sources, which either only
+        consider the last symbols of the stream (sliding window) or weight symbols by exponential decay of their age. Each
+        window is identified by a key, given by its codes as digits in base vocabulary_size, so that cost of an arriving symbol
+        does not depend on how many symbols have been seen. Only positions with max_order symbols of history are counted.
+
+        Counts are converted to KGramCounts on demand (see to_kgram_counts), from which tree is estimated with
+        VLMC.fit_counts as often as required.
+    """
+
+    # Decayed counts are kept divided by a common scale, which is applied to all of them once it becomes smaller than
+    # min_scale. Keys whose applied count falls below min_count are then dropped, so that number of keys stays bounded by
+    # windows seen recently enough to still have weight, instead of growing with every window ever seen
+    min_scale = 1e-3
+    min_count = 0.5
+
+    def __init__(
+        self,
+        max_order,
+        vocabulary_size,
+        window=None,
+        decay=None
+    ):
+        """
+            Class constructor method. Args:
+                - max_order (int): max depth of contexts to be counted.
+                - vocabulary_size (int): number of symbols in vocabulary.
+                - window (int): number of most recent positions that are counted. Counts of a position are removed once it
+                leaves the window.
+                - decay (float): factor in (0, 1) by which weight of counted positions is multiplied at each arriving symbol.
+            Exactly one of window and decay must be given.
+        """
+        if (window is None) == (decay is None):
+            raise ValueError("Exactly one of window and decay must be specified.")
+        if (window is not None) and (window < 1):
+            raise ValueError("Window must have at least one position.")
+        if (decay is not None) and not (0 < decay < 1):
+            raise ValueError("Decay must be in interval (0, 1).")
+        if float(vocabulary_size)**(max_order+1) >= np.iinfo(np.int64).max:
+            raise ValueError("Windows of length max_order+1 must be representable as 64-bit keys.")
+
+        self.max_order = int(max_order)
+        self.vocabulary_size = int(vocabulary_size)
+        self.window = window
+        self.decay = decay
+
+        self.counts = {}
+        self.scale = 1.0
+        self.tail = np.zeros(0, dtype=get_code_dtype(self.vocabulary_size))
+        self.__keys = deque()
+
+    def update(
+        self,
+        X
+    ):
+        """
+            Adds encoded symbols X, which continue stream seen so far. Keys of new windows are computed at once, and counts
+            are updated once for each distinct key in X (and, for sliding windows, for each distinct key that leaves window).
+        """
+
+        k = self.max_order
+        V = self.vocabulary_size
+        X = np.concatenate([self.tail, np.asarray(X).astype(self.tail.dtype)])
+        self.tail = X[max(len(X)-k, 0):].copy()
+        if len(X) <= k:
+            return self
+
+        keys = sliding_window_view(X, k+1).astype(np.int64) @ (V**np.arange(k, -1, -1, dtype=np.int64))
+
+        if self.window is not None:
+            # Only the last window keys can remain, and keys of older positions leave window
+            keys = keys[max(len(keys)-self.window, 0):]
+            self.__keys.extend(keys.tolist())
+            n_leaving = max(len(self.__keys)-self.window, 0)
+            leaving = np.array([self.__keys.popleft() for _ in range(n_leaving)], dtype=np.int64)
+            self.__add(keys, np.ones(len(keys)))
+            self.__add(leaving, -np.ones(len(leaving)))
+        else:
+            # Weight of each new position is decay^(its age at end of X), relative to common scale
+            m = len(keys)
+            factor = self.scale*self.decay**m
+            if factor < self.min_scale:
+                self.counts = {key: c*factor for key, c in self.counts.items() if c*factor >= self.min_count}
+                self.scale = 1.0
+            else:
+                self.scale = factor
+            self.__add(keys, self.decay**np.arange(m-1, -1, -1)/self.scale)
+
+        return self
+
+    def __add(
+        self,
+        keys,
+        weights
+    ):
+        """
+            Adds weights to counts of keys, removing keys whose count reaches zero.
+        """
+        distinct, inverse = np.unique(keys, return_inverse=True)
+        totals = np.bincount(inverse.reshape(-1), weights=weights, minlength=len(distinct))
+        for key, total in zip(distinct.tolist(), totals.tolist()):
+            count = self.counts.get(key, 0) + total
+            if count > 0:
+                self.counts[key] = count
+            else:
+                self.counts.pop(key, None)
+
+    def to_kgram_counts(self):
+        """
+            Returns counts as KGramCounts, in which sample is given by counted positions alone (so head of sample is empty).
+            Tree and solvers work on integer counts, so decayed counts are rounded to the nearest integer.
+        """
+
+        k = self.max_order
+        V = self.vocabulary_size
+        kgram_counts = KGramCounts(
+            max_order=k,
+            vocabulary_size=V
+        )
+
+        keys = np.array(sorted(self.counts.keys()), dtype=np.int64)
+        counts = np.rint(np.array([self.counts[key] for key in keys.tolist()])*self.scale).astype(np.int64)
+        keys, counts = keys[counts > 0], counts[counts > 0]
+
+        # Digits of keys, from oldest to newest symbol; sorted keys give windows in lexicographic order
+        kgram_counts.set_windows(
+            windows=((keys[:, None] // V**np.arange(k, -1, -1, dtype=np.int64)) % V).astype(self.tail.dtype),
+            window_counts=counts
+        )
+        kgram_counts.n = int(np.sum(counts))
+        kgram_counts.tail = self.tail.copy()
+
+        return kgram_counts
@@ -0,0 +1,75 @@
+import numpy as np
+
+
+class RegularizationPath:
+    """
+        Context trees selected by a solver from the same tree of counts for a grid of values of one of its parameters (see
+        VLMC.regularization_path). Each tree is kept as a mask of nodes of tree of counts, so that trees are only built when
+        required. Attributes:
+            - method (string): method for estimating context tree.
+            - parameter (string): parameter of solver that is varied.
+            - values (array): values of parameter, in ascending order.
+            - masks (array): (values x nodes) array with mask of nodes of tree of counts kept for each value.
+    """
+
+    def __init__(
+        self,
+        count_tree,
+        method,
+        parameter,
+        values,
+        masks
+    ):
+        """
+            Class constructor method. Args:
+                - count_tree (ContextTree): tree of counts from which trees are selected.
+                - method (string): method for estimating context tree.
+                - parameter (string): parameter of solver that is varied.
+                - values (array): values of parameter, in ascending order.
+                - masks (array): (values x nodes) array of masks of kept nodes.
+        """
+        self.count_tree = count_tree
+        self.method = method
+        self.parameter = parameter
+        self.values = values
+        self.masks = masks
+
+    def __len__(self):
+        return len(self.values)
+
+    @property
+    def breakpoints(self):
+        """
+            Indexes of values at which selected tree differs from tree selected for previous value.
+        """
+        return np.flatnonzero(np.any(self.masks[1:] != self.masks[:-1], axis=1)) + 1
+
+    @property
+    def n_leaves(self):
+        """
+            Number of leaves of tree selected for each value.
+        """
+        tree = self.count_tree
+        has_kept_child = np.zeros(self.masks.shape, dtype=bool)
+        np.logical_or.at(has_kept_child.T, tree.parent[1:], self.masks[:, 1:].T)
+        return np.sum(self.masks & ~has_kept_child, axis=1)
+
+    def get_tree(
+        self,
+        index
+    ):
+        """
+            Returns context tree (ContextTree) selected for value of given index.
+        """
+        return self.count_tree.select(self.masks[index])
+
+    def get_segments(self):
+        """
+            Returns list of (first value, last value, tree) for each range of consecutive values in which selected tree does
+            not change.
+        """
+        starts = np.r_[0, self.breakpoints]
+        ends = np.r_[self.breakpoints, len(self.values)] - 1
+        return [
+            (self.values[s], self.values[e], self.get_tree(s)) for s, e in zip(starts, ends)
+        ]
@@ -0,0 +1,78 @@
+import numpy as np
+
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+
+
+class SharedSample:
+    """
+        Encoded sample published once in shared memory, so that workers of a multiprocessing pool can attach to it without
+        copies, instead of receiving the whole sample with each task. Objects are context managers: shared memory block is
+        created on entering and always released (closed and unlinked) on exiting, even if an error is raised.
+    """
+
+    def __init__(
+        self,
+        X
+    ):
+        """
+            Class constructor method. Args:
+                - X (array): encoded sample, as array of symbol codes.
+        """
+        self.X = np.asarray(X)
+        self.shm = None
+
+    def __enter__(self):
+        self.shm = shared_memory.SharedMemory(
+            create=True,
+            size=max(self.X.nbytes, 1)
+        )
+        buffer = np.ndarray(self.X.shape, dtype=self.X.dtype, buffer=self.shm.buf)
+        buffer[:] = self.X
+        del buffer
+        return self
+
+    def __exit__(
+        self,
+        exc_type,
+        exc_value,
+        traceback
+    ):
+        self.close()
+        return False
+
+    def close(self):
+        """
+            Releases shared memory block.
+        """
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+    @property
+    def initargs(self):
+        """
+            Arguments for attach_sample, which workers use to attach to sample.
+        """
+        return (self.shm.name, self.X.shape, self.X.dtype.str)
+
+
+@contextmanager
+def attach_sample(
+    name,
+    shape,
+    dtype
+):
+    """
+        Attaches worker process to sample in shared memory for the duration of a batch of tasks, yielding it. Attachment is
+        always closed on exit, so that no worker keeps the block mapped once it is unlinked; references to yielded sample
+        must be dropped before exiting.
+    """
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        X = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+        yield X
+    finally:
+        X = None
+        shm.close()
@@ -0,0 +1,220 @@
+import numpy as np
+
+from .utils import get_code_dtype
+
+
+class SketchCounts:
+    """
+        Approximate context and transition counts kept in two Count-Min sketches of fixed size, one for number of ocurrences
+        of contexts and one for transitions from contexts to each symbol, so that memory is given by configuration instead of
+        by number of distinct contexts. Contexts are identified by a rolling hash of their symbols, from newest to oldest, so
+        that hash of a context is obtained from hash of its parent.
+
+        Each sketch has depth rows of width counters. Estimates are never below true counts, and, with probability at least
+        1 - exp(-depth), exceed them by at most e/width times the total count inserted in the sketch (which is about
+        (max_order+1) times sample length). Error bounds eps and delta are obtained with width = ceil(e/eps) and
+        depth = ceil(ln(1/delta)).
+
+        Counts are organized in levels, as for KGramCounts, by expanding contexts from the root: children of a context are
+        kept if their estimated number of ocurrences is at least min_count and exceeds the error bound of the sketch, so that
+        contexts whose estimates could be made up of collisions alone are not expanded once the sketch saturates. Each level
+        keeps at most width contexts (those with largest estimates), so size of tree is bounded by configuration as well.
+        Tree is estimated from counts with VLMC.fit_counts; as windows of sample are not kept, word association is not
+        verified for admissible trees.
+    """
+
+    # Multiplier of rolling hash and salts of hash functions, one per row of sketches
+    prime = np.uint64(0x9E3779B97F4A7C15)
+
+    def __init__(
+        self,
+        max_order,
+        vocabulary_size,
+        width=2**20,
+        depth=4,
+        min_count=1,
+        seed=0
+    ):
+        """
+            Class constructor method. Args:
+                - max_order (int): max depth of contexts to be counted.
+                - vocabulary_size (int): number of symbols in vocabulary.
+                - width (int): number of counters in each row of sketches.
+                - depth (int): number of rows (independent hash functions) of sketches.
+                - min_count (int): min estimated number of ocurrences for a context to be part of levels, in addition to
+                error bound of sketch (see levels).
+                - seed (int): seed for salts of hash functions.
+        """
+        self.max_order = int(max_order)
+        self.vocabulary_size = int(vocabulary_size)
+        self.width = int(width)
+        self.depth = int(depth)
+        self.min_count = min_count
+        self.salts = np.random.default_rng(seed).integers(0, 2**63, size=(2, self.depth), dtype=np.int64).astype(np.uint64)
+
+        self.n = 0
+        self.n_windows = 0
+        self.ocurrences = np.zeros((self.depth, self.width), dtype=np.int64)
+        self.transitions = np.zeros((self.depth, self.width), dtype=np.int64)
+        self.root_transitions = np.zeros(self.vocabulary_size, dtype=np.int64)
+        self.tail = np.zeros(0, dtype=get_code_dtype(self.vocabulary_size))
+
+    def fit(
+        self,
+        X
+    ):
+        """
+            Counts all contexts of length up to max_order and their transitions in encoded sample X.
+        """
+        return self.partial_fit(X)
+
+    def partial_fit(
+        self,
+        X
+    ):
+        """
+            Adds counts of encoded chunk X, which continues sample counted so far. As for KGramCounts, ocurrences are only
+            counted for positions with max_order symbols of history, while transitions from shorter contexts are counted for
+            all positions with enough history.
+        """
+
+        k = self.max_order
+        X = np.asarray(X).astype(self.tail.dtype)
+        Y = np.concatenate([self.tail, X])
+        offset = len(self.tail)
+
+        # Sample position of each new symbol
+        positions = self.n + np.arange(len(X))
+        symbols = X.astype(np.uint64)
+
+        # Counts of the root are exact
+        self.root_transitions += np.bincount(X.astype(np.int64), minlength=self.vocabulary_size)
+        is_window = positions >= k
+
+        # Hash of context of length l of each position is obtained from its hash for length l-1 and the symbol l positions
+        # before it
+        hashes = np.zeros(len(X), dtype=np.uint64)
+        with np.errstate(over='ignore'):
+            for l in range(1, k+1):
+                has_history = positions >= l
+                previous = Y[offset-l+np.flatnonzero(has_history)].astype(np.uint64)
+                hashes[has_history] = hashes[has_history]*self.prime + previous + np.uint64(1)
+                self.__add(self.transitions, 1, hashes[has_history]*self.prime + symbols[has_history] + np.uint64(1))
+                self.__add(self.ocurrences, 0, hashes[is_window])
+
+        self.n += len(X)
+        self.n_windows += int(np.sum(is_window))
+        self.tail = Y[max(len(Y)-k, 0):].copy()
+
+        return self
+
+    def __buckets(
+        self,
+        sketch_index,
+        keys
+    ):
+        """
+            Returns (depth x keys) array with counter of each key in each row of sketch, obtained by mixing keys with salt of
+            row (splitmix64 finalizer).
+        """
+        with np.errstate(over='ignore'):
+            z = keys[None, :] ^ self.salts[sketch_index][:, None]
+            z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+            z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+            z = z ^ (z >> np.uint64(31))
+        return (z % np.uint64(self.width)).astype(np.int64)
+
+    def __add(
+        self,
+        sketch,
+        sketch_index,
+        keys
+    ):
+        """
+            Adds one to counters of all keys in sketch.
+        """
+        if len(keys) == 0:
+            return
+        for r, buckets in enumerate(self.__buckets(sketch_index, keys)):
+            sketch[r] += np.bincount(buckets, minlength=self.width)
+
+    def __estimate(
+        self,
+        sketch,
+        sketch_index,
+        keys
+    ):
+        """
+            Returns estimated count of each key, which is the min of its counters among rows of sketch.
+        """
+        buckets = self.__buckets(sketch_index, keys)
+        return np.min(sketch[np.arange(self.depth)[:, None], buckets], axis=0)
+
+    def truncate(
+        self,
+        max_order
+    ):
+        """
+            Returns counts whose levels only go up to max_order. Sketches are shared, since they hold all depths.
+        """
+        if max_order > self.max_order:
+            raise ValueError('Counts can only be truncated to an order not greater than {}.'.format(self.max_order))
+        counts = SketchCounts.__new__(SketchCounts)
+        counts.__dict__.update(self.__dict__)
+        counts.max_order = int(max_order)
+        return counts
+
+    @property
+    def error(self):
+        """
+            Bound on overestimation of number of ocurrences of a context (with probability at least 1 - exp(-depth)), which
+            is e/width times the total count inserted in sketch of ocurrences.
+        """
+        return np.e*int(np.sum(self.ocurrences[0]))/self.width
+
+    @property
+    def levels(self):
+        """
+            Counts organized in levels, one per depth, in the same format as KGramCounts.levels. Children of kept contexts
+            are expanded for all symbols, and kept if their estimated number of ocurrences is at least min_count and greater
+            than error bound (see error), up to width contexts per level with largest estimates. Estimates of a child are
+            bounded by estimate of its parent.
+        """
+
+        V = self.vocabulary_size
+        symbols = np.arange(V, dtype=np.uint64) + np.uint64(1)
+        levels = [{
+            'parent': np.array([-1]),
+            'symbol': np.array([-1]),
+            'n_ocurrences': np.array([self.n_windows], dtype=np.int64),
+            'transition_counts': self.root_transitions.reshape(1, V).copy()
+        }]
+
+        hashes = np.zeros(1, dtype=np.uint64)
+        n_ocurrences = levels[0]['n_ocurrences']
+        error = self.error
+        with np.errstate(over='ignore'):
+            for l in range(1, self.max_order+1):
+                # Candidates are all children of contexts in previous level, sorted by parent and symbol
+                candidates = (hashes[:, None]*self.prime + symbols[None, :]).reshape(-1)
+                estimates = np.minimum(
+                    self.__estimate(self.ocurrences, 0, candidates),
+                    np.repeat(n_ocurrences, V)
+                )
+                keep = np.flatnonzero((estimates >= self.min_count) & (estimates > max(error, 0)))
+                if len(keep) == 0:
+                    break
+                if len(keep) > self.width:
+                    keep = np.sort(keep[np.argsort(-estimates[keep], kind='stable')[:self.width]])
+
+                hashes = candidates[keep]
+                n_ocurrences = estimates[keep]
+                transition_keys = (hashes[:, None]*self.prime + symbols[None, :]).reshape(-1)
+                levels.append({
+                    'parent': keep // V,
+                    'symbol': keep % V,
+                    'n_ocurrences': n_ocurrences,
+                    'transition_counts': self.__estimate(self.transitions, 1, transition_keys).reshape(len(keep), V)
+                })
+
+        return levels
@@ -0,0 +1,174 @@
+import numpy as np
+
+
+class SuffixArray:
+    """
+        Suffix array built over an encoded sample, with its longest common prefix (LCP) array. Suffix array is obtained by
+        prefix doubling, in which suffixes are sorted by their first 2^k symbols for increasing k until all ranks are distinct,
+        keeping only ranks of current step. Ocurrences of a word are found by binary search, in O(|w| log n) time, so queries
+        do not require LCP, which is only built when first accessed (see lcp).
+    """
+
+    # Number of suffixes whose LCP is computed from each chunk of Python integers, so that memory for them stays bounded
+    lcp_chunk_size = 2**16
+
+    def __init__(
+        self,
+        X
+    ):
+        """
+            Class constructor method. Args:
+                - X (array): encoded sample, as array of symbol codes.
+        """
+        self.X = np.ascontiguousarray(X)
+        self.n = len(self.X)
+        self.sa = self.__build()
+        self.__lcp = None
+
+    @property
+    def lcp(self):
+        """
+            LCP between each suffix of suffix array and the previous one (0 for the first), built on first access.
+        """
+        if self.__lcp is None:
+            self.__lcp = self.__get_lcp()
+        return self.__lcp
+
+    def __build(self):
+        """
+            Builds suffix array by prefix doubling. Suffixes are sorted at each step by a single key that combines their
+            rank with the rank of the suffix k positions ahead.
+        """
+
+        n = self.n
+        if n == 0:
+            return np.zeros(0, dtype=np.int64)
+
+        # Rank of suffixes according to first symbol. Only ranks of current step are kept
+        rank = self.X.astype(np.int64)
+        k = 1
+        while True:
+            # Rank of suffix starting k positions ahead is the secondary key; suffixes ending before it come first. Ranks are
+            # below n after first step (and codes before it), so both keys fit in a single integer
+            key = rank*(max(n, int(np.max(rank))+1)+1)
+            key[:n-k] += rank[k:]+1
+            sa = np.argsort(key)
+
+            # New rank is incremented every time key changes in sorted order
+            key = key[sa]
+            changes = np.empty(n, dtype=np.int64)
+            changes[0] = 0
+            np.not_equal(key[1:], key[:-1], out=changes[1:])
+            del key
+            rank[sa] = np.cumsum(changes, out=changes)
+            del changes
+
+            if rank[sa[-1]] == n-1:
+                break
+            k *= 2
+
+        return sa
+
+    def __get_lcp(self):
+        """
+            Builds LCP array with Kasai's algorithm, in O(n) time and space. Suffixes are visited in order of position in
+            sample, each with the suffix preceding it in suffix array (phi). Common prefix of a suffix with its predecessor is
+            at least the one of previous position minus one, so it is never recomputed from scratch. Symbols are read
+            through a memory view of sample, and predecessors are converted to Python integers one chunk at a time.
+        """
+
+        n = self.n
+        sa = self.sa
+        if n == 0:
+            return np.zeros(0, dtype=np.int64)
+        phi = np.empty(n, dtype=np.int64)
+        phi[sa[0]] = -1
+        phi[sa[1:]] = sa[:-1]
+
+        X = memoryview(self.X)
+        plcp = np.empty(n, dtype=np.int64)
+        h = 0
+        for start in range(0, n, self.lcp_chunk_size):
+            chunk = []
+            for i, j in enumerate(phi[start:start+self.lcp_chunk_size].tolist(), start):
+                if j < 0:
+                    h = 0
+                    chunk.append(0)
+                    continue
+                while (i+h < n) and (j+h < n) and (X[i+h] == X[j+h]):
+                    h += 1
+                chunk.append(h)
+                if h > 0:
+                    h -= 1
+            plcp[start:start+len(chunk)] = chunk
+        del phi
+
+        # LCP of each suffix is found at its position in sample
+        return plcp[sa]
+
+    def __bound(
+        self,
+        word,
+        lo,
+        hi,
+        offset=0,
+        upper=False
+    ):
+        """
+            Binary search for first suffix in sa[lo:hi] whose symbols starting at offset are greater or equal (or greater, if
+            upper is True) to word.
+        """
+        m = len(word)
+        while lo < hi:
+            mid = (lo+hi)//2
+            start = self.sa[mid]+offset
+            suffix = tuple(self.X[start:start+m].tolist())
+            if (suffix <= word) if upper else (suffix < word):
+                lo = mid+1
+            else:
+                hi = mid
+        return lo
+
+    def find(
+        self,
+        word
+    ):
+        """
+            Returns interval [lo, hi) of suffix array containing all ocurrences of word (tuple of codes).
+        """
+        word = tuple(int(c) for c in word)
+        lo = self.__bound(word, 0, self.n)
+        hi = self.__bound(word, lo, self.n, upper=True)
+        # Suffixes that are proper prefixes of word sort before it, so interval only contains full matches
+        return lo, hi
+
+    def count(
+        self,
+        word
+    ):
+        """
+            Returns number of ocurrences of word (tuple of codes) in sample.
+        """
+        lo, hi = self.find(word)
+        return hi-lo
+
+    def transition_counts(
+        self,
+        word,
+        vocabulary_size
+    ):
+        """
+            Returns array with number of ocurrences of word (tuple of codes) followed by each symbol in vocabulary. Inside the
+            interval of word, suffixes are sorted by the symbol that follows it, so each count is found by binary search.
+        """
+        lo, hi = self.find(word)
+        m = len(word)
+        counts = np.zeros(vocabulary_size, dtype=np.int64)
+        for s in range(vocabulary_size):
+            if lo >= hi:
+                break
+            s_lo = self.__bound((s,), lo, hi, offset=m)
+            s_hi = self.__bound((s,), s_lo, hi, offset=m, upper=True)
+            counts[s] = s_hi-s_lo
+            lo = s_hi
+        return counts
@@ -0,0 +1,147 @@
+import numpy as np
+
+from .suffix_array import SuffixArray
+
+
+class SuffixCounts:
+    """
+        Context and transition counts without a max order, obtained from a suffix array of the reversed sample. The context
+        of length l of position i of X, read from its newest symbol, is a prefix of suffix n-i of reversed sample, so
+        ocurrences of a context are an interval of suffix array, and children of a context split its interval at positions
+        where LCP equals its length. All depths are available from suffix array and LCP, in O(n) space.
+
+        Contexts are expanded level by level while they have at least two children. A context that is always preceded by the
+        same symbol is made a leaf, as its only child would be trimmed for the tree to be irreducible anyway, so depth of tree
+        is given by data. Number of ocurrences of a context counts all positions with enough history to contain it, and
+        transitions are counted for the same positions. Counts are organized in levels, in the same format as
+        KGramCounts.levels.
+
+        Each position of suffix array is visited once, at the depth given by its LCP, and transitions are counted once over
+        intervals of leaves and summed into their ancestors, so work is O(n) plus a constant per depth, also for trees as deep
+        as the sample (e.g. for long runs of a single symbol).
+    """
+
+    def __init__(
+        self,
+        vocabulary_size
+    ):
+        """
+            Class constructor method. Args:
+                - vocabulary_size (int): number of symbols in vocabulary.
+        """
+        self.vocabulary_size = int(vocabulary_size)
+        self.levels = []
+
+    @property
+    def max_order(self):
+        """
+            Depth of deepest context.
+        """
+        return len(self.levels)-1
+
+    def fit(
+        self,
+        X
+    ):
+        """
+            Builds suffix array of reversed encoded sample X and expands contexts from it.
+        """
+
+        X = np.asarray(X)
+        V = self.vocabulary_size
+        n = len(X)
+        R = X[::-1]
+        self.n = n
+
+        # Suffix 0 of reversed sample (position n of X) has no next symbol, so it is left out. LCP of suffixes around it
+        # is the smallest of its LCPs
+        suffix_array = SuffixArray(X=R)
+        sa, lcp = suffix_array.sa, suffix_array.lcp
+        if n > 0:
+            removed = int(np.flatnonzero(sa == 0)[0])
+            sa, lcp = np.delete(sa, removed), np.delete(lcp, removed)
+            if removed < n-1:
+                lcp[removed] = min(suffix_array.lcp[removed], lcp[removed]) if removed > 0 else 0
+
+        # Next symbol of each suffix, which is symbol of X at position of suffix
+        next_symbol = R[sa-1].astype(np.int64)
+
+        self.levels = [{
+            'parent': np.array([-1]),
+            'symbol': np.array([-1]),
+            'n_ocurrences': np.array([n], dtype=np.int64),
+            'transition_counts': np.bincount(X.astype(np.int64), minlength=V).reshape(1, V)
+        }]
+        if len(sa) == 0:
+            return self
+
+        # Positions of suffix array grouped by their LCP value, in order. Children of an interval of depth l start at its
+        # first position and at positions inside it whose LCP is l, so each position is only visited at depth given by its
+        # LCP, and work of each depth depends on its number of contexts alone, not on sizes of their intervals
+        by_lcp = np.argsort(lcp, kind='stable')
+        lcp_offsets = np.r_[0, np.cumsum(np.bincount(lcp))]
+
+        # Intervals of contexts of each depth, with first position of exhausted suffix of each context (or -1), which
+        # belongs to no child
+        intervals = [(np.zeros(1, dtype=np.int64), np.array([len(sa)], dtype=np.int64))]
+        exhausted_at = []
+        lo, hi = intervals[0]
+        l = 0
+        while True:
+            positions = by_lcp[lcp_offsets[l]:lcp_offsets[l+1]] if l+1 < len(lcp_offsets) else by_lcp[:0]
+            node = np.searchsorted(lo, positions, side='right')-1
+            inside = (positions > lo[node]) & (positions < hi[node])
+            starts = np.sort(np.concatenate([lo, positions[inside]]))
+            node = np.searchsorted(lo, starts, side='right')-1
+            ends = hi[node]
+            ends[:-1] = np.minimum(starts[1:], ends[:-1])
+
+            # Suffixes of length l are exhausted and belong to no child. As they sort first, they can only start an interval
+            exhausted = sa[starts]+l >= n
+            exhausted_at.append(np.full(len(lo), -1, dtype=np.int64))
+            exhausted_at[-1][node[exhausted]] = starts[exhausted]
+
+            # Contexts are only expanded if they have at least two children
+            is_child = ~exhausted
+            n_children = np.bincount(node[is_child], minlength=len(lo))
+            is_child &= n_children[node] >= 2
+            if not np.any(is_child):
+                break
+
+            # Children of expanded contexts, in order of parent and symbol
+            lo, hi = starts[is_child], ends[is_child]
+            self.levels.append({
+                'parent': node[is_child],
+                'symbol': R[sa[lo]+l].astype(np.int64),
+                'n_ocurrences': hi-lo
+            })
+            intervals.append((lo, hi))
+            l += 1
+
+        # Transitions are counted over intervals of leaves, which are disjoint, and summed from children into their parents
+        # from the deepest level, together with transitions of exhausted suffixes of parents
+        for l in range(len(self.levels)-1, 0, -1):
+            level = self.levels[l]
+            lo, hi = intervals[l]
+            is_leaf = np.ones(len(lo), dtype=bool)
+            exhausted = np.zeros(0, dtype=np.int64)
+            if l+1 < len(self.levels):
+                is_leaf[self.levels[l+1]['parent']] = False
+                exhausted = np.flatnonzero(~is_leaf & (exhausted_at[l] >= 0))
+            sizes = (hi-lo)[is_leaf]
+            leaves = np.repeat(np.flatnonzero(is_leaf), sizes)
+            members = np.arange(len(leaves)) - np.repeat(np.cumsum(sizes)-sizes, sizes) + np.repeat(lo[is_leaf], sizes)
+            counts = np.bincount(
+                np.concatenate([leaves, exhausted])*V + next_symbol[np.concatenate([members, exhausted_at[l][exhausted]])],
+                minlength=len(lo)*V
+            ).reshape(len(lo), V)
+
+            # Children are sorted by parent, so transitions of children of each parent are a contiguous block of rows
+            if l+1 < len(self.levels):
+                child_level = self.levels[l+1]
+                parent = child_level['parent']
+                first = np.flatnonzero(np.r_[True, parent[1:] != parent[:-1]])
+                counts[parent[first]] += np.add.reduceat(child_level['transition_counts'], first, axis=0)
+            level['transition_counts'] = counts.astype(np.int64)
+
+        return self
@@ -1,14 +1,28 @@
 import numpy as np
 
+from numpy.lib.stride_tricks import sliding_window_view
+
 def count_word_ocurrences(
     X,
     word
 ):
     """
-        Counts the number of ocurrences of word in sample X.
+        Counts the number of ocurrences of word in sample X. Sample is scanned in full for each word, so this is kept as
+        reference implementation; KGramCounts obtains counts for all words in a single pass.
     """
     
     l=len(word)
+    
+    # Encoded samples are scanned with array operations
+    if isinstance(X, np.ndarray):
+        if l > len(X):
+            return 0
+        if l == 0:
+            return len(X)+1
+        return int(np.sum(
+            np.all(sliding_window_view(X, l) == np.asarray(word), axis=1)
+        ))
+    
     counts=0
     for i in range(l, len(X)+1):
         if X[i-l:i] == word:
@@ -57,18 +71,65 @@ def count_transitions_ocurrences(
         }
     }
 
-def obtain_associated_context(
-    leaves,
-    word
+def get_code_dtype(
+    vocabulary_size
+):
+    """
+        Obtains smallest unsigned integer type able to represent codes for a vocabulary of given size.
+    """
+    if vocabulary_size <= np.iinfo(np.uint8).max+1:
+        return np.uint8
+    if vocabulary_size <= np.iinfo(np.uint16).max+1:
+        return np.uint16
+    return np.uint32
+
+
+def open_codes(
+    path,
+    vocabulary_size
 ):
     """
-        Associates a member of leaves to word.
+        Opens raw binary file of symbol codes as read-only memory-mapped array, without loading it. Codes are expected to be
+        stored with the smallest unsigned integer type that fits vocabulary size (see get_code_dtype).
     """
-    associated_context = {word: []}
-    for l in leaves:
-        length_leaf = len(l)
-        if word[-length_leaf:]==l:
-            associated_context[word].append(l)
-    # if len(associated_context[word])==0:
-    #     import pdb;pdb.set_trace()
-    return associated_context
\ No newline at end of file
+    return np.memmap(
+        path,
+        dtype=get_code_dtype(vocabulary_size),
+        mode='r'
+    )
+
+
+def encode_sample(
+    X,
+    vocabulary
+):
+    """
+        Encodes sample X as array of integer codes, in which the code of a symbol is its position in vocabulary. Integer type
+        is the smallest one that fits vocabulary size.
+    """
+
+    dtype = get_code_dtype(len(vocabulary))
+    X_arr = np.asarray(X)
+    vocabulary_arr = np.asarray(vocabulary)
+
+    # Numeric samples are encoded by binary search on sorted vocabulary
+    if X_arr.ndim == 1 and np.issubdtype(X_arr.dtype, np.number) and np.issubdtype(vocabulary_arr.dtype, np.number):
+        sorter = np.argsort(vocabulary_arr, kind='stable')
+        positions = np.searchsorted(vocabulary_arr, X_arr, sorter=sorter)
+        positions = np.minimum(positions, len(vocabulary_arr)-1)
+        codes = sorter[positions]
+        invalid = vocabulary_arr[codes] != X_arr
+        if np.any(invalid):
+            raise ValueError('Symbol {} is not in vocabulary.'.format(X_arr[np.argmax(invalid)]))
+        return codes.astype(dtype)
+
+    # Other samples are encoded symbol by symbol
+    symbol_to_code = {s: i for i, s in enumerate(vocabulary)}
+    try:
+        return np.fromiter(
+            (symbol_to_code[x] for x in X),
+            dtype=dtype,
+            count=len(X)
+        )
+    except KeyError as e:
+        raise ValueError('Symbol {} is not in vocabulary.'.format(e.args[0]))
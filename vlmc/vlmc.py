@@ -1,27 +1,53 @@
+import numpy as np
+
+import os
 from .bic_solver import BICSolver
 from .context_algorithm_solver import ContextAlgorithmSolver
 from .bct_solver import BCTSolver
 from .counter import Counter
+from .count_cache import CountCache
+from .regularization_path import RegularizationPath
+from .kgram_counts import KGramCounts
+from .online_counts import OnlineCounts
+from .utils import encode_sample, open_codes
+from .backend import get_backend
+from .suffix_array import SuffixArray
+from .word import Word
 
 from treelib import Node, Tree
 
 class VLMC:
     """
         Objects from this class represent a tree for a variable-length Markov Chain (VLMC) and are endowed with useful methods. Representation 
-        is created by using a set of Word class objects. For each node (represented by a Word), children are a list of Word
-        objects (each a node or leaf) saved to its "children" attribute.
+        is a ContextTree, in which nodes are stored in contiguous arrays, saved to "context_tree" attribute after fit. Tree of counts from
+        which it was pruned is kept in "count_tree" attribute, so that it can be pruned again with solve. For backward
+        compatibility, nodes can also be accessed as Word-like views: "tree" attribute is a view of the root, and children of each
+        node are views saved to its "children" attribute.
     """
     def __init__(
         self,
         max_order,
         vocabulary,
-        make_admissible=True
+        make_admissible=True,
+        tree_construction='full',
+        cache=None
     ):
         """
             Class constructor method. Args:
-                - max_order (int): max depth for tree.
+                - max_order (int): max depth for tree. If None, depth is not bounded: counts for contexts of all lengths are
+                obtained from a suffix array of reversed sample, contexts are expanded while they have more than one child,
+                and depth is decided by solvers. Trees without max order are always built sparsely, are not truncated to
+                log(len(X)) by admissibility criteria and can only be fitted from samples in memory.
                 - vocabulary (array): array of symbols that are the vocabulary for the tree.
                 - make_admissible (boolean): flags for applying admissibility criteria to context tree.
+                - tree_construction (string): 'full' (default) builds tree of counts with all |V|^l possible words of each depth
+                l up to depth of tree (max_order, possibly lowered by admissibility criteria), with zero counts for words that
+                do not appear in sample, which are then pruned by solvers. 'sparse' only creates nodes for contexts that appear
+                in sample, so memory scales with number of distinct contexts. Contexts without ocurrences are never part of a
+                sparse tree, even if admissibility criteria are not applied.
+                - cache (CountCache): cache of trees of counts, so that samples in memory that were already counted with the
+                same settings (by this or other tree objects sharing cache) are not counted again on fit. Default is None,
+                in which case samples are always counted.
         """
         
         # Checks if vocabulary is not None
@@ -30,219 +56,614 @@ class VLMC:
         else:
             self.vocabulary=vocabulary
             self.__vocabulary_str = [str(s) for s in vocabulary]
+            self.symbol_to_code = {s: i for i, s in enumerate(vocabulary)}
+            if len(self.symbol_to_code) != len(vocabulary):
+                raise ValueError("Vocabulary for variable length markov chain must not have repeated symbols.")
         
-        # Checks if max_order is not None
-        if max_order is None:
-            raise ValueError("Max order for variable length markov chain must be specified.")
-        else:
-            self.max_order = int(max_order)
+        # Max order is None for trees whose depth is given by data. Admissibility criteria lower max_order to depth of fitted
+        # tree, so configured max order is kept apart; counts and fits always start from it
+        self.max_order = int(max_order) if max_order is not None else None
+        self.__max_order = self.max_order
             
         # Saves flag for admissibility
         self.make_admissible = make_admissible
         
-        # Initialize full tree with given max depth and vocabulary, and save to tree
-        self.tree = self.__initialize_tree()
-        
-    def __initialize_tree(self):
-        """
-            This method initializes full tree with given max depth and vocabulary.
-        """
-        
-        def __get_children(parent):
-            # Only obtain nodes if given max_order is not 0
-            if self.max_order>0:
-                
-                children={}
-                
-                # If at root, initialize root children
-                if parent.word=='root':                
-                    word_len=1
-                    for s in self.__vocabulary_str:
-                        children[s] = Word(
-                            word=s,
-                            word_len=word_len,
-                            is_leaf=True if word_len==self.max_order else False
-                        )
-
-                else:
-                    # If not at root, initialize node children
-                    word_len=parent.word_len+1
-                    for s in self.__vocabulary_str:
-                        children[s] = Word(
-                            word=s+parent.word,
-                            word_len=word_len,
-                            is_leaf=True if word_len==self.max_order else False
-                        )      
-                # If not at depth max_order-1, recursively call method to move down tree
-                if word_len < self.max_order:
-                    for k, w in children.items():
-                        children[k]=__get_children(parent=w)
-                # If at depth max_order-1, save children to Word object. Leaves do not have
-                # children, so the "children" attribute for them is None.
-                else:
-                    parent.children=children
-                    return parent
-                
-                # Move back towards the root saving children to parents' "children" attribute
-                parent.children=children
-                
-            return parent
-        
-        # Initialize Word object for root
-        root=Word(word='root')
-        
-        # Recursively initialize Word objects to represent tree nodes
-        tree = __get_children(
-            parent=root
-        )
+        # Checks tree construction mode
+        if tree_construction not in ('full', 'sparse'):
+            raise ValueError("Tree construction must be either 'full' or 'sparse'.")
+        self.tree_construction = tree_construction
+        
+        # Checks cache of trees of counts
+        if (cache is not None) and not isinstance(cache, CountCache):
+            raise ValueError("Cache must be a CountCache object.")
+        self.cache = cache
         
-        return tree
+        # Tree is built from data during counting, and kept as tree of counts; solvers prune it into context tree
+        self.context_tree = None
+        self.count_tree = None
+        self.__n = None
+        
+        # Encoded sample and its suffix array, which is only built on first context query
+        self.X = None
+        self.__suffix_array = None
+        
+        # Counts accumulated by partial_fit, which are only kept while streaming
+        self.__stream_counts = None
+    
+    @property
+    def context_tree(self):
+        """
+            Context tree estimated in last fit (ContextTree).
+        """
+        return self.__context_tree
+    
+    @context_tree.setter
+    def context_tree(self, tree):
+        # Index of leaves depends on tree, so it is invalidated whenever tree is replaced (e.g. by pruning)
+        self.__context_tree = tree
+        self.__leaf_index = None
+    
+    @property
+    def leaf_index(self):
+        """
+            Dict from tuple of codes of each context (leaf) of context tree, in chronological order, to its node index.
+            Index is built on first use and cached until context tree changes.
+        """
+        if self.context_tree is None:
+            raise ValueError("Variable length markov chain must be fitted before looking up leaves.")
+        if self.__leaf_index is None:
+            tree = self.context_tree
+            leaves = tree.leaves
+            self.__leaf_index = dict(zip(tree.get_all_codes(leaves), leaves.tolist()))
+        return self.__leaf_index
+    
+    def get_leaf(
+        self,
+        context
+    ):
+        """
+            Returns Word-like view of leaf of context tree whose context is given sequence of symbols, in chronological
+            order, or None if context is not a leaf. Lookup uses cached leaf index (see leaf_index).
+        """
+        node = self.leaf_index.get(tuple(self.symbol_to_code.get(s, -1) for s in context))
+        return None if node is None else self.context_tree.view(node)
+    
+    @property
+    def tree(self):
+        """
+            Word-like view of root of context tree.
+        """
+        if self.context_tree is None:
+            return None
+        return self.context_tree.view(0)
+    
+    def iter_nodes(
+        self,
+        order='level'
+    ):
+        """
+            Generator of all nodes as Word-like views, which are created as they are consumed. Nodes are visited in given
+            order, which can be either 'level' (default), 'preorder' or 'postorder' (see ContextTree.preorder).
+        """
+        tree = self.context_tree
+        if tree is None:
+            raise ValueError("Variable length markov chain must be fitted before obtaining nodes.")
+        if order=='level':
+            nodes = range(tree.n_nodes)
+        elif order=='preorder':
+            nodes = tree.preorder.tolist()
+        elif order=='postorder':
+            nodes = tree.postorder.tolist()
+        else:
+            raise ValueError("Order of nodes must be either 'level', 'preorder' or 'postorder'.")
+        for i in nodes:
+            yield tree.view(i)
+    
+    def iter_leaves(self):
+        """
+            Generator of leaves of tree as Word-like views, in level order.
+        """
+        tree = self.context_tree
+        if tree is None:
+            raise ValueError("Variable length markov chain must be fitted before obtaining leaves.")
+        for i in tree.leaves.tolist():
+            yield tree.view(i)
     
     def get_all_nodes(self):
         """
-            Get all nodes as Word objects in list.
+            Get all nodes as Word-like views in list, in level order.
         """
-
-        def __get_all_nodes(node):
-            """
-                Recursively move in tree, saving Word objects in list.
-            """
-
-            child_nodes = []
-            # If not at leaves
-            if node.children is not None:
-                # Iterate in children, recursively calling method
-                for w in node.children.values():
-                    child_nodes.extend(__get_all_nodes(node=w))
-            # If at leaves
-            else:
-                # Return node (Word object)
-                return [node]
-            
-            # Return concatenated list of node and child nodes
-            return [node] + child_nodes
-        
-        # Call method to count all nodes
-        nodes = __get_all_nodes(node=self.tree)
-
-        return nodes
+        return list(self.iter_nodes())
         
     def get_leaves(self):
         """
-            This method obtains all leaves for tree. All nodes are obtained, and then leaves are filtered.
+            This method obtains all leaves for tree, as Word-like views in list.
         """
-
-        nodes = self.get_all_nodes()
-        leaves = [n for n in nodes if n.is_leaf]
-
-        return leaves
+        return list(self.iter_leaves())
+    
+    def encode(
+        self,
+        X
+    ):
+        """
+            Encodes sample X as array of integer codes, in which the code of a symbol is its position in vocabulary.
+        """
+        return encode_sample(
+            X=X,
+            vocabulary=self.vocabulary
+        )
         
     def fit(
         self,
         X,
         solver=None,
         method='bic',
-        njobs=1
+        njobs=1,
+        backend=None,
+        block_size=2**24,
+        **kwargs
     ):
         """
            High-level method for performing inference in context tree. Arguments:
-               - X (array): input sample.
+               - X (array, path or np.memmap): input sample. Paths and memory-mapped arrays are taken as (possibly larger than
+               memory) samples of symbol codes, given by position of symbols in vocabulary, and are fitted out of core: sample
+               is read in blocks, whose counts are accumulated as in partial_fit, and tree is estimated from counts. Files given
+               by path are read as raw binary with the smallest unsigned integer type that fits vocabulary (see utils.open_codes).
                - solver: to be implemented, option for giving already initialized BICSolver, ContextAlgorithmSolver or BCTSolver with custom parameters
                as input.
                - method (string): method for estimating context tree. Can be either 'bic', 'context' or 'bct'. Default is 'bic'.
                - njobs (int): number of parallel jobs to instantiate for performing symbol counting and other tasks.
+               - backend (Backend or string): execution backend for parallel tasks, one of 'serial', 'thread', 'process' or a
+               Backend object, which may be reused across fits. If None, tasks run serially for njobs=1 and in a process pool
+               otherwise.
+               - block_size (int): number of symbols read at a time from samples fitted out of core.
+               - kwargs: parameters of solver (see solve).
         """
         
+        # Samples out of core are only read to be counted in blocks, and tree is estimated from counts
+        if isinstance(X, (str, os.PathLike, np.memmap)):
+            self.X = None
+            self.__suffix_array = None
+            self.__stream_counts = None
+            self.fit_counts(
+                counts=self.count(
+                    X=X,
+                    njobs=njobs,
+                    backend=backend,
+                    block_size=block_size
+                ),
+                method=method,
+                njobs=njobs,
+                backend=backend,
+                **kwargs
+            )
+            return
+        
+        # Encode sample once; counting, verification and solvers all run on symbol codes
+        X = self.encode(X)
+        self.X = X
+        self.max_order = self.__max_order
+        self.__suffix_array = None
+        self.__stream_counts = None
+        
         if solver is not None:
             # TODO: make compatible with giving solver object as argument
             pass
         
-        else:
-            # Solves if specified method is BIC
-            if method=='bic':
-                Counter.fit(
-                    vlmc=self,
-                    X=X,
-                    njobs=njobs
-                )
-                BICSolver.fit(
-                    vlmc=self,
-                    X=X
-                )
-            # Solves if specified method is Context Algorithm
-            elif method=='context':
-                Counter.fit(
-                    vlmc=self,
-                    X=X,
-                    njobs=njobs
-                )
-                ContextAlgorithmSolver.fit(
-                    vlmc=self,
-                    X=X
-                )
-            # Solves if specified method is BCT
-            elif method=='bct':
-                Counter.fit(
-                    vlmc=self,
-                    X=X,
-                    njobs=njobs
-                )
-                BCTSolver.fit(
-                    vlmc=self,
-                    X=X
-                )
-    
+        # Counts and solves if specified method is BIC, Context Algorithm or BCT
+        elif method in ('bic', 'context', 'bct'):
+            self.__count_sample(
+                X=X,
+                njobs=njobs,
+                backend=backend
+            )
+            self.solve(
+                method=method,
+                **kwargs
+            )
     
-    def show_tree(self):
+    def __count_sample(
+        self,
+        X,
+        njobs,
+        backend
+    ):
         """
-            Method for showing tree saved in "tree" attribute.
+            Obtains tree of counts of encoded sample X, which is taken from cache if sample was already counted with the
+            same settings, and cached otherwise.
         """
         
-        def __create_plot_node(parent, tree):
+        self.__n = len(X)
+        key = None
+        if self.cache is not None:
+            key = CountCache.get_key(
+                X=X,
+                vocabulary=self.vocabulary,
+                max_order=self.__max_order,
+                make_admissible=self.make_admissible,
+                tree_construction=self.tree_construction
+            )
+            entry = self.cache.get(key)
             
-            if parent.children is not None:
-                for w in parent.children.values():
-                    tree.create_node(w.word, w.word, parent=parent.word)
-                    __create_plot_node(parent=w, tree=tree)
-                    
-            else:
+            # Admissibility criteria may have reduced max order while counting, so it is restored from cache
+            if entry is not None:
+                self.count_tree, self.max_order = entry
+                self.context_tree = self.count_tree
                 return
-            return tree
+        
+        Counter.fit(
+            vlmc=self,
+            X=X,
+            njobs=njobs,
+            backend=backend
+        )
+        if key is not None:
+            self.cache.put(
+                key=key,
+                count_tree=self.count_tree,
+                max_order=self.max_order
+            )
+    
+    def fit_many(
+        self,
+        X,
+        methods=('bic', 'context', 'bct'),
+        njobs=1,
+        backend=None,
+        block_size=2**24
+    ):
+        """
+            Counts sample X once and estimates a context tree with each of given methods, by pruning the same tree of counts
+            (see solve). Arguments are the same as for fit, except for:
+               - methods (list): methods for estimating context tree, each either 'bic', 'context' or 'bct'. Items can also be
+               (method, kwargs) pairs, with kwargs given to solve as parameters of solver.
+            Returns dict with context tree (ContextTree) estimated by each method, keyed by method name, or by (method,
+            sorted kwargs items) for pairs. Tree estimated by last method is left in "context_tree" attribute.
+        """
+        
+        methods = [(m, {}) if isinstance(m, str) else (m[0], dict(m[1])) for m in methods]
+        if len(methods) == 0:
+            raise ValueError("At least one method for estimating context tree must be specified.")
+        for method, _ in methods:
+            if method not in ('bic', 'context', 'bct'):
+                raise ValueError("Method for estimating context tree must be either 'bic', 'context' or 'bct'.")
+        
+        # Counting is performed by fit with first method, whose tree is then estimated again with its parameters
+        self.fit(
+            X=X,
+            method=methods[0][0],
+            njobs=njobs,
+            backend=backend,
+            block_size=block_size
+        )
+        
+        trees = {}
+        for method, kwargs in methods:
+            self.solve(
+                method=method,
+                **kwargs
+            )
+            trees[method if not kwargs else (method, tuple(sorted(kwargs.items())))] = self.context_tree
+        
+        return trees
+    
+    
+    def partial_fit(
+        self,
+        X
+    ):
+        """
+            Adds chunk X to counts accumulated for streamed sample, which continues chunks given in previous calls. Only the
+            last max_order symbols are kept across calls, so that cost of each call depends on size of chunk alone and history
+            does not need to be kept or rescanned. Context tree is estimated from accumulated counts by calling finalize.
+        """
+        
+        if self.__max_order is None:
+            raise ValueError("Counts can only be accumulated for variable length markov chains with max order.")
+        if self.__stream_counts is None:
+            self.__stream_counts = KGramCounts(
+                max_order=self.__max_order,
+                vocabulary_size=len(self.vocabulary)
+            )
+        self.__stream_counts.partial_fit(
+            X=self.encode(X)
+        )
+        
+        # Whole sample is not kept, so contexts cannot be queried
+        self.X = None
+        self.__suffix_array = None
+        
+        return self
+    
+    def count(
+        self,
+        X,
+        njobs=1,
+        backend=None,
+        block_size=2**24
+    ):
+        """
+            Counts all contexts up to max_order in sample X, without estimating tree, and returns counts as KGramCounts. Counts
+            of contiguous shards of a sample can be obtained separately (e.g. in different processes), saved as snapshots
+            with KGramCounts.save, merged with merge_counts and given to fit_counts. Arguments are the same as for fit; paths and
+            memory-mapped arrays are read in blocks of block_size symbol codes.
+        """
+        
+        if self.__max_order is None:
+            raise ValueError("Counts can only be accumulated for variable length markov chains with max order.")
+        counts = KGramCounts(
+            max_order=self.__max_order,
+            vocabulary_size=len(self.vocabulary)
+        )
+        out_of_core = isinstance(X, (str, os.PathLike, np.memmap))
+        if out_of_core and not isinstance(X, np.memmap):
+            X = open_codes(
+                path=X,
+                vocabulary_size=len(self.vocabulary)
+            )
+        
+        backend, owns_backend = get_backend(
+            backend=backend,
+            njobs=njobs
+        )
+        try:
+            # Samples in memory are encoded and counted as a single block. With more than one job, blocks are split in
+            # chunks counted in parallel
+            if not out_of_core:
+                return counts.fit(
+                    X=self.encode(X),
+                    backend=backend if backend.njobs > 1 else None
+                )
             
-        tree_plot = Tree()
-        tree_plot.create_node(self.tree.word, self.tree.word)
-        tree_plot = __create_plot_node(
-            parent=self.tree,
-            tree=tree_plot
+            for start in range(0, len(X), block_size):
+                block = np.asarray(X[start:start+block_size])
+                invalid = (block < 0) | (block >= len(self.vocabulary))
+                if np.any(invalid):
+                    raise ValueError('Code {} at position {} is not in vocabulary.'.format(
+                        block[np.argmax(invalid)],
+                        start+np.argmax(invalid)
+                    ))
+                counts.partial_fit(
+                    X=block,
+                    backend=backend if backend.njobs > 1 else None
+                )
+            return counts
+        finally:
+            if owns_backend:
+                backend.close()
+    
+    def finalize(
+        self,
+        method='bic',
+        njobs=1,
+        backend=None,
+        **kwargs
+    ):
+        """
+            Estimates context tree from counts accumulated by partial_fit, as fit would do for the concatenation of all chunks.
+            Accumulated counts are kept, so streaming can continue after finalizing. Arguments:
+               - method (string): method for estimating context tree. Can be either 'bic', 'context' or 'bct'. Default is 'bic'.
+               - njobs (int): number of parallel jobs to instantiate for tasks performed on counts.
+               - backend (Backend or string): execution backend for parallel tasks (see fit).
+               - kwargs: parameters of solver (see solve).
+        """
+        
+        if self.__stream_counts is None:
+            raise ValueError("Variable length markov chain must receive data with partial_fit before being finalized.")
+        
+        return self.fit_counts(
+            counts=self.__stream_counts,
+            method=method,
+            njobs=njobs,
+            backend=backend,
+            **kwargs
         )
+    
+    def fit_counts(
+        self,
+        counts,
+        method='bic',
+        njobs=1,
+        backend=None,
+        **kwargs
+    ):
+        """
+            Estimates context tree from counts of a sample (see count and merge_counts), as fit would do for the sample itself.
+            Tree depth is limited by both max_order and order of counts. Arguments:
+               - counts (KGramCounts, OnlineCounts or SketchCounts): counts of sample. Online counts are converted with
+               to_kgram_counts, so tree can be estimated again whenever required while they are updated. Approximate counts
+               from SketchCounts are used as estimated, without verification of word association, and tree of counts is
+               always built sparse from them (see tree_construction).
+               - method (string): method for estimating context tree. Can be either 'bic', 'context' or 'bct'. Default is 'bic'.
+               - njobs (int): number of parallel jobs to instantiate for tasks performed on counts.
+               - backend (Backend or string): execution backend for parallel tasks (see fit).
+               - kwargs: parameters of solver (see solve).
+        """
         
-        tree_plot.show()
+        if self.__max_order is None:
+            raise ValueError("Counts can only be accumulated for variable length markov chains with max order.")
+        if isinstance(counts, OnlineCounts):
+            counts = counts.to_kgram_counts()
+        if counts.n == 0:
+            raise ValueError("Counts must be obtained from a non-empty sample.")
+        if counts.vocabulary_size != len(self.vocabulary):
+            raise ValueError("Counts must be obtained for a vocabulary of size {}.".format(len(self.vocabulary)))
+        if method not in ('bic', 'context', 'bct'):
+            raise ValueError("Method for estimating context tree must be either 'bic', 'context' or 'bct'.")
         
-
-
-           
+        self.max_order = min(self.__max_order, counts.max_order)
+        Counter.fit(
+            vlmc=self,
+            X=None,
+            njobs=njobs,
+            backend=backend,
+            kgram_counts=counts
+        )
+        self.__n = counts.n
+        self.solve(
+            method=method,
+            **kwargs
+        )
+        
+        return self
+    
+    def solve(
+        self,
+        method='bic',
+        **kwargs
+    ):
+        """
+            Estimates context tree by pruning tree of counts obtained in last fit, which is not modified, so that several
+            methods or parameters can be tried without counting again. Pruned tree is saved to "context_tree" attribute.
+            Arguments:
+               - method (string): method for estimating context tree. Can be either 'bic', 'context' or 'bct'. Default is 'bic'.
+               - kwargs: parameters of solver, which are penalty for 'bic' (penalty of each context in log-likelihood, which is
+               (|V|-1)/2 log(n) by default), alpha, beta and child_count_admissible (flag for requiring each symbol to follow a
+               context more than 2 alpha n/log(n) times for its children to be kept) for 'context', and beta for 'bct'.
+            Returns mask of nodes of tree of counts that are kept in context tree.
+        """
         
+        if self.count_tree is None:
+            raise ValueError("Variable length markov chain must be fitted before solving.")
         
-class Word:
-    """
-        Object that represents a node, corresponding to a specific symbol in context tree.
-    """
+        if method=='bic':
+            return BICSolver.fit(
+                vlmc=self,
+                X=self.X,
+                n=self.__n,
+                **kwargs
+            )
+        elif method=='context':
+            return ContextAlgorithmSolver.fit(
+                vlmc=self,
+                X=self.X,
+                **kwargs
+            )
+        elif method=='bct':
+            return BCTSolver.fit(
+                vlmc=self,
+                X=self.X,
+                n=self.__n,
+                **kwargs
+            )
+        raise ValueError("Method for estimating context tree must be either 'bic', 'context' or 'bct'.")
     
-    def __init__(
+    def regularization_path(
         self,
-        word=None,
-        word_len=None,
-        is_leaf=None,
-        n_ocurrences=None,
-        transition_counts=None,
-        transition_probabilities=None,
-        children=None
+        values,
+        method='bic',
+        parameter=None,
+        max_size=2**24,
+        **kwargs
     ):
-        self.word=word
-        self.word_len=word_len
-        self.is_leaf=is_leaf
-        self.n_ocurrences=n_ocurrences
-        self.transition_probabilities=transition_probabilities
-        self.children=children
-
+        """
+            Selects context trees for a grid of values of a parameter of solver, from tree of counts obtained in last fit.
+            Trees for all values are obtained together, in a single pass of solver over levels of tree of counts, so cost
+            is close to that of a single solve. Context tree of tree object is not modified. Arguments:
+               - values (array): values of parameter, which are sorted in ascending order.
+               - method (string): method for estimating context tree. Can be either 'bic', 'context' or 'bct'. Default is 'bic'.
+               - parameter (string): parameter of solver that is varied, which is 'penalty' for 'bic', 'alpha' or 'beta' for
+               'context' and 'beta' for 'bct' (see solve). Default is 'penalty' for 'bic' and 'beta' otherwise.
+               - max_size (int): max number of (value, node) entries processed in each pass; grids with more entries are
+               processed in several passes.
+               - kwargs: values of parameters of solver that are not varied.
+            Returns RegularizationPath, with mask of selected tree for each value and breakpoints at which tree changes.
+        """
+        
+        if self.count_tree is None:
+            raise ValueError("Variable length markov chain must be fitted before obtaining regularization path.")
+        solvers = {
+            'bic': BICSolver,
+            'context': ContextAlgorithmSolver,
+            'bct': BCTSolver
+        }
+        if method not in solvers:
+            raise ValueError("Method for estimating context tree must be either 'bic', 'context' or 'bct'.")
+        if parameter is None:
+            parameter = 'penalty' if method=='bic' else 'beta'
+        
+        values = np.sort(np.asarray(values, dtype=float).reshape(-1))
+        if len(values) == 0:
+            raise ValueError("At least one value of parameter must be specified.")
+        
+        # Grid is split in chunks, so that arrays of each pass have at most max_size entries
+        chunk_size = max(max_size//self.count_tree.n_nodes, 1)
+        masks = np.concatenate([
+            solvers[method].fit_path(
+                vlmc=self,
+                parameter=parameter,
+                values=values[start:start+chunk_size],
+                **kwargs
+            ) for start in range(0, len(values), chunk_size)
+        ])
+        
+        return RegularizationPath(
+            count_tree=self.count_tree,
+            method=method,
+            parameter=parameter,
+            values=values,
+            masks=masks
+        )
+    
+    def query_context(
+        self,
+        context
+    ):
+        """
+            Obtains counts for a context in fitted sample, regardless of whether context is a node of tree. Context is given as
+            sequence of symbols, in chronological order. A suffix array is built over encoded sample on first call, after which
+            each query runs in O(|context| log n). Returns a Word object with number of ocurrences of context followed by any
+            symbol, transition counts and transition probabilities.
+        """
+        
+        if self.X is None:
+            raise ValueError("Variable length markov chain must be fitted before querying contexts.")
+        
+        if self.__suffix_array is None:
+            self.__suffix_array = SuffixArray(X=self.X)
+        
+        context = list(context)
+        codes = tuple(self.encode(context).tolist()) if len(context) > 0 else ()
+        counts = self.__suffix_array.transition_counts(
+            word=codes,
+            vocabulary_size=len(self.vocabulary)
+        )
+        n_ocurrences = np.sum(counts)
+        
+        transition_counts = {
+            s: c for s, c in zip(self.__vocabulary_str, counts)
+        }
         
+        return Word(
+            word=''.join([self.__vocabulary_str[c] for c in codes]) if len(codes) > 0 else 'root',
+            word_len=len(codes),
+            n_ocurrences=n_ocurrences,
+            transition_counts=transition_counts,
+            transition_probabilities={
+                s: c/n_ocurrences for s, c in transition_counts.items()
+            },
+            codes=codes
+        )
+    
+    def show_tree(self):
+        """
+            Method for showing tree saved in "context_tree" attribute.
+        """
+        
+        tree = self.context_tree
+        if tree is None:
+            raise ValueError("Variable length markov chain must be fitted before showing tree.")
+        tree_plot = Tree()
+        tree_plot.create_node(tree.get_word(0), 0)
+        
+        # Nodes are created in pre-order, so parents are always created before their children, and words of all nodes are
+        # obtained at once
+        nodes = tree.preorder[1:]
+        for i, codes in zip(nodes.tolist(), tree.get_all_codes(nodes)):
+            tree_plot.create_node(
+                ''.join([tree.vocabulary_str[c] for c in codes]),
+                i,
+                parent=int(tree.parent[i])
+            )
+        
+        tree_plot.show()
@@ -1,5 +0,0 @@
-from .vlmc import VLMC
-from .bic_solver import BICSolver
-from .context_algorithm_solver import ContextAlgorithmSolver
-from .bct_solver import BCTSolver
-from .counter import Counter
\ No newline at end of file
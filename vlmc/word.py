@@ -0,0 +1,83 @@
+class Word:
+    """
+        Object that represents a node, corresponding to a specific symbol in context tree. Attribute "word" is the
+        concatenation of symbols in context, used for display, while "codes" is the tuple of symbol codes in context
+        (in chronological order), used for all matching against the encoded sample.
+    """
+    
+    def __init__(
+        self,
+        word=None,
+        word_len=None,
+        is_leaf=None,
+        n_ocurrences=None,
+        transition_counts=None,
+        transition_probabilities=None,
+        children=None,
+        codes=None
+    ):
+        self.word=word
+        self.word_len=word_len
+        self.is_leaf=is_leaf
+        self.n_ocurrences=n_ocurrences
+        self.transition_probabilities=transition_probabilities
+        self.transition_counts=transition_counts
+        self.children=children
+        self.codes=codes
+
+
+class WordView:
+    """
+        Word-like view of a node of a ContextTree, kept for backward compatibility with code that walks trees through Word
+        attributes. No values are stored in views; all attributes are read from the arrays of the tree.
+    """
+    
+    def __init__(
+        self,
+        tree,
+        node
+    ):
+        self.tree=tree
+        self.node=int(node)
+    
+    @property
+    def word(self):
+        return self.tree.get_word(self.node)
+    
+    @property
+    def word_len(self):
+        return int(self.tree.depth[self.node])
+    
+    @property
+    def codes(self):
+        return self.tree.get_codes(self.node)
+    
+    @property
+    def is_leaf(self):
+        return bool(self.tree.n_children[self.node] == 0)
+    
+    @property
+    def n_ocurrences(self):
+        return self.tree.n_ocurrences[self.node]
+    
+    @property
+    def transition_counts(self):
+        return {
+            s: c for s, c in zip(self.tree.vocabulary_str, self.tree.get_transition_counts(self.node))
+        }
+    
+    @property
+    def transition_probabilities(self):
+        n_ocurrences = self.n_ocurrences
+        return {
+            s: c/n_ocurrences for s, c in self.transition_counts.items()
+        }
+    
+    @property
+    def children(self):
+        # Leaves do not have children, so the "children" attribute for them is None
+        if self.is_leaf:
+            return None
+        return {
+            self.tree.vocabulary_str[self.tree.symbol[c]]: WordView(tree=self.tree, node=c) for c in self.tree.get_children(self.node)
+        }